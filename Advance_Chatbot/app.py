@@ -1,5 +1,7 @@
 import os
+import sys
 import json
+import time
 import base64
 from flask import Flask, render_template, request, jsonify, session, Response
 from werkzeug.utils import secure_filename
@@ -9,12 +11,25 @@ import uuid
 import markdown
 from script_detector import script_detector
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.profiling import profiler_from_env, init_profiling
+from common import services
+from image_triage import ImageTriage, TRIAGE_MODE
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
+# Opt-in stage timers (/metrics), sampled request profiles and /debug/profile (PROFILING=on)
+profiler = init_profiling(app, profiler_from_env())
+
+# Optional local pre-triage of image attachments (CHAT_TRIAGE=context|answer); needs the
+# skin/MRI classifiers in the same process, i.e. running under the gateway. Template answers
+# need the image type picked in the upload preview (sent as image.task)
+image_triage = ImageTriage(services.classify, services.tasks, mode=TRIAGE_MODE)
+
 # Configure Gemini AI
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
@@ -211,8 +226,10 @@ def index():
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
     """Handle chat messages"""
+    start = time.perf_counter()
     try:
-        data = request.get_json()
+        with profiler.stage('parse'):
+            data = request.get_json()
         message = data.get('message', '').strip()
         image_data = data.get('image')
         
@@ -225,8 +242,9 @@ def chat_endpoint():
         
         # Add script preservation instruction if there's text
         if message:
-            detected_script = script_detector.detect_script(message)
-            script_instruction = script_detector.create_script_instruction(detected_script, message)
+            with profiler.stage('script_detect'):
+                detected_script = script_detector.detect_script(message)
+                script_instruction = script_detector.create_script_instruction(detected_script, message)
             parts.append({'text': script_instruction})
             
             # Add user message to history before processing
@@ -248,24 +266,51 @@ def chat_endpoint():
                 friendly_error = get_user_friendly_error(str(e))
                 return jsonify({'error': friendly_error}), 400
         
+        # Run the image through the local classifier first; a confident result for an image the
+        # client declared a task for ('skin' or 'mri') can skip the LLM, a guessed task only adds context
+        triage = None
+        if image_data and image_triage.enabled:
+            declared_task = image_data.get('task') or data.get('task')
+            with profiler.stage('local_triage'):
+                triage = image_triage.run(image_bytes, declared_task)
+            if image_triage.can_answer(triage, message, declared_task):
+                answer = image_triage.answer(triage)
+                add_to_history('assistant', answer, detected_script)
+                image_triage.record('local_template', time.perf_counter() - start)
+                return jsonify({
+                    'response': answer,
+                    'detected_script': detected_script,
+                    'chat_id': session.get('chat_id'),
+                    'history_length': len(session.get('chat_history', [])),
+                    'triage': triage,
+                    'success': True
+                })
+            if triage:
+                parts.append(image_triage.context_part(triage))
+        
         if message:
             parts.append({'text': f"User message: {message}"})
         
         # Get chat session and send message
-        chat = get_chat_session()
-        response = chat.send_message(parts)
+        with profiler.stage('chat_session'):
+            chat = get_chat_session()
+        with profiler.stage('llm'):
+            response = chat.send_message(parts)
         
         # Clean the response to remove internal instructions
         cleaned_response = clean_ai_response(response.text)
         
         # Add AI response to history
         add_to_history('assistant', cleaned_response, detected_script)
+        image_triage.record('llm+local' if triage else 'llm', time.perf_counter() - start,
+                            getattr(response, 'usage_metadata', None))
         
         return jsonify({
             'response': cleaned_response,
             'detected_script': detected_script,
             'chat_id': session.get('chat_id'),
             'history_length': len(session.get('chat_history', [])),
+            'triage': triage,
             'success': True
         })
         
@@ -386,6 +431,11 @@ def get_chat_history():
         friendly_error = get_user_friendly_error(str(e))
         return jsonify({'error': friendly_error}), 500
 
+@app.route('/api/chat/triage/metrics', methods=['GET'])
+def triage_metrics():
+    """Requests, latency and LLM tokens per reply path (llm, llm+local, local_template)"""
+    return jsonify(image_triage.metrics())
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Handle file uploads"""
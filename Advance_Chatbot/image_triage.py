@@ -0,0 +1,143 @@
+import io
+import os
+import time
+import threading
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+# CONFIG
+TRIAGE_MODE = os.getenv('CHAT_TRIAGE', 'off')    # off | context | answer
+ANSWER_CONFIDENCE = float(os.getenv('CHAT_TRIAGE_CONFIDENCE', '90'))
+GRAYSCALE_SPREAD = 8        # max channel spread (0-255) for an image to count as a scan
+HISTORY = 1000
+
+CONDITION_NOTES = {
+    'skin': {
+        'Acne': "Acne happens when hair follicles get blocked with oil and dead skin cells. Gentle cleansing, non-comedogenic products and not squeezing spots usually help; benzoyl peroxide or adapalene are common over-the-counter options.",
+        'Eczema': "Eczema (atopic dermatitis) makes skin dry, itchy and inflamed. Regular fragrance-free moisturisers, lukewarm showers and avoiding known triggers help; flares are often treated with prescription creams.",
+        'Psoriasis': "Psoriasis is an immune condition that speeds up skin cell turnover, causing thick, scaly plaques. It is not contagious. Moisturisers help, and a doctor can offer topical, light or systemic treatments.",
+        'Rosacea': "Rosacea causes facial redness, visible blood vessels and sometimes bumps. Sun protection, gentle skincare and avoiding triggers such as heat, alcohol and spicy food help; prescription treatments are available.",
+        'Vitiligo': "Vitiligo causes patches of skin to lose pigment. It is not contagious or dangerous, but the patches burn easily, so sun protection matters. A dermatologist can discuss treatments that may restore colour.",
+    },
+    'mri': {
+        'glioma': "Gliomas are tumours that start in the brain's glial cells. Only a specialist reviewing the full scan and history can confirm this; please share the images with a neurologist or neurosurgeon.",
+        'meningioma': "Meningiomas grow from the membranes around the brain and are often slow-growing and benign. A specialist should review the full scan to confirm and discuss monitoring or treatment.",
+        'no tumor': "The local model did not find signs of a tumour in this slice. A single image cannot rule anything out; a radiologist should read the full study, especially if symptoms continue.",
+        'pituitary': "Pituitary tumours grow in the pituitary gland at the base of the brain and are usually benign, but can affect hormones or vision. An endocrinologist or neurosurgeon should review the scan.",
+    },
+}
+MODALITY = {'skin': 'skin image', 'mri': 'brain MRI'}
+
+
+def looks_like_scan(image_bytes):
+    """MRI slices are grayscale; skin photos are not"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img = img.convert('RGB')
+        img.thumbnail((64, 64))
+        pixels = np.asarray(img, dtype=np.int16)
+    return int((pixels.max(axis=2) - pixels.min(axis=2)).mean()) <= GRAYSCALE_SPREAD
+
+
+@lru_cache(maxsize=None)
+def templated_answer(task, label):
+    """Rendered once per (task, class) and reused for every confident prediction"""
+    note = CONDITION_NOTES.get(task, {}).get(label, "")
+    return (f"**Local screening result:** this {MODALITY.get(task, 'image')} looks most like **{label}**.\n\n"
+            f"{note}\n\n"
+            "This is an automated screening by an on-device model, not a diagnosis. "
+            "Please consult a doctor to confirm, and seek urgent care if symptoms are severe or getting worse.")
+
+
+class ImageTriage:
+    """Optional pre-triage of chat image attachments by the local skin/MRI classifiers.
+
+    mode='context' attaches the local prediction to the LLM prompt; mode='answer'
+    also replies from a template without calling the LLM, but only when the client
+    declared which model the image is for, sent no message and the prediction is
+    confident. A guessed task (grayscale -> MRI, anything else -> skin) is only
+    ever used as context, since e.g. a pill photo is not a skin image. Only active
+    when classifiers are loaded in the same process (the gateway). Latency and
+    token counters are kept per path.
+    """
+
+    def __init__(self, classify, tasks, mode='off', answer_confidence=ANSWER_CONFIDENCE):
+        self.classify = classify    # classify(task, image_bytes) -> {'class', 'confidence', ...}
+        self.tasks = tasks          # tasks() -> names of the loaded classifiers
+        self.mode = mode
+        self.answer_confidence = answer_confidence
+        self._lock = threading.Lock()
+        self._paths = {}
+
+    @property
+    def enabled(self):
+        return self.mode in ('context', 'answer') and bool(self.tasks())
+
+    def pick_task(self, image_bytes):
+        available = self.tasks()
+        task = 'mri' if looks_like_scan(image_bytes) else 'skin'
+        return task if task in available else (available[0] if available else None)
+
+    def run(self, image_bytes, task=None):
+        """Local prediction for an image with the declared task (else a guessed one), or None"""
+        try:
+            if task is None:
+                task = self.pick_task(image_bytes)
+            if task is None or task not in self.tasks():
+                return None
+            start = time.perf_counter()
+            prediction = dict(self.classify(task, image_bytes))
+            prediction.update({'task': task, 'triage_ms': round(1000 * (time.perf_counter() - start), 2)})
+            return prediction
+        except Exception as e:
+            print(f"Local triage failed: {e}")
+            return None
+
+    def can_answer(self, prediction, message='', task=None):
+        """Template replies need a client-declared task, an empty message and a confident prediction"""
+        return (self.mode == 'answer' and prediction is not None
+                and task is not None and prediction['task'] == task
+                and not message.strip()
+                and prediction['confidence'] >= self.answer_confidence)
+
+    def answer(self, prediction):
+        return templated_answer(prediction['task'], prediction['class'])
+
+    @staticmethod
+    def context_part(prediction):
+        """Structured context for the LLM prompt"""
+        return {'text': (
+            f"LOCAL CLASSIFIER RESULT ({MODALITY.get(prediction['task'], 'image')} model, not a diagnosis): "
+            f"class={prediction['class']}; confidence={prediction['confidence']}%; "
+            f"model_version={prediction.get('model_version')}. "
+            "Use this as a hint alongside your own reading of the image."
+        )}
+
+    def record(self, path, seconds, usage=None):
+        """Count one reply on path ('llm', 'llm+local' or 'local_template') with its latency and tokens"""
+        prompt = getattr(usage, 'prompt_token_count', 0) or 0
+        response = getattr(usage, 'candidates_token_count', 0) or 0
+        with self._lock:
+            stats = self._paths.setdefault(path, {'requests': 0, 'prompt_tokens': 0, 'response_tokens': 0,
+                                                  'latency': deque(maxlen=HISTORY)})
+            stats['requests'] += 1
+            stats['prompt_tokens'] += prompt
+            stats['response_tokens'] += response
+            stats['latency'].append(seconds)
+
+    def metrics(self):
+        with self._lock:
+            paths = {path: dict(stats, latency=list(stats['latency'])) for path, stats in self._paths.items()}
+        result = {'mode': self.mode, 'classifiers': self.tasks(), 'paths': {}}
+        for path, stats in paths.items():
+            ms = np.asarray(stats.pop('latency')) * 1000
+            requests = stats['requests']
+            stats.update({
+                'tokens_per_request': round((stats['prompt_tokens'] + stats['response_tokens']) / requests, 1),
+                'latency_ms': {'mean': round(float(ms.mean()), 2), 'p50': round(float(np.percentile(ms, 50)), 2),
+                               'p95': round(float(np.percentile(ms, 95)), 2)},
+            })
+            result['paths'][path] = stats
+        return result
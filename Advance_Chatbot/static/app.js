@@ -246,6 +246,11 @@ function handleImageUpload(event) {
                     <div class="file-info">
                         <span class="file-name">${fileName}</span>
                         <span class="file-size">${fileSize}</span>
+                        <select class="image-task" aria-label="What does this image show?">
+                            <option value="">Image type: not sure</option>
+                            <option value="skin">Skin photo</option>
+                            <option value="mri">Brain MRI</option>
+                        </select>
                     </div>
                     <button class="remove-image-btn" aria-label="Remove file">&times;</button>
                 </div>
@@ -304,6 +309,18 @@ function handleImageUpload(event) {
         previewContainer
             .querySelector('.remove-image-btn')
             .addEventListener('click', clearImagePreview);
+        // Declaring the image type lets the local skin/MRI model answer image-only messages
+        // directly (CHAT_TRIAGE=answer); "not sure" only gives the LLM the local result as a hint
+        const taskSelect = previewContainer.querySelector('.image-task');
+        if (taskSelect) {
+            taskSelect.addEventListener('change', () => {
+                if (taskSelect.value) {
+                    uploadedImage.task = taskSelect.value;
+                } else {
+                    delete uploadedImage.task;
+                }
+            });
+        }
     };
     reader.readAsDataURL(file);
 }
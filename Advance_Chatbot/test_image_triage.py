@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Local image triage tests (fake classifiers, no LLM)
+
+import io
+import sys
+import os
+import types
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from image_triage import ImageTriage, looks_like_scan
+
+
+def encode(color):
+    buf = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def make_triage(mode, confidence=95.0):
+    calls = []
+
+    def classify(task, image_bytes):
+        calls.append(task)
+        return {'class': 'Acne' if task == 'skin' else 'glioma', 'confidence': confidence, 'model_version': 'v1'}
+
+    return ImageTriage(classify, lambda: ['mri', 'skin'], mode=mode), calls
+
+
+def test_grayscale_images_go_to_the_mri_model():
+    assert looks_like_scan(encode((90, 90, 90)))
+    assert not looks_like_scan(encode((200, 120, 100)))
+    triage, calls = make_triage('context')
+    assert triage.run(encode((90, 90, 90)))['task'] == 'mri'
+    assert triage.run(encode((200, 120, 100)))['class'] == 'Acne'
+    assert calls == ['mri', 'skin']
+
+
+def test_only_declared_confident_image_only_requests_are_answered_locally():
+    triage, _ = make_triage('answer')
+    prediction = triage.run(encode((200, 120, 100)), task='skin')
+    assert triage.can_answer(prediction, '', 'skin')
+    assert 'Acne' in triage.answer(prediction) and 'not a diagnosis' in triage.answer(prediction)
+    assert not triage.can_answer(prediction, 'what is this?', 'skin')
+    assert not triage.can_answer(prediction, '', 'mri')
+    assert not triage.can_answer(dict(prediction, confidence=50.0), '', 'skin')
+    assert not make_triage('context')[0].can_answer(prediction, '', 'skin')
+    assert triage.run(encode((200, 120, 100)), task='xray') is None
+    assert not ImageTriage(None, lambda: [], mode='answer').enabled
+
+
+def test_colourful_non_skin_images_are_never_answered_from_a_template():
+    triage, calls = make_triage('answer', confidence=99.0)
+    pill = encode((40, 90, 230))    # a blue pill photo is not grayscale, so the guess is 'skin'
+    prediction = triage.run(pill)
+    assert prediction['task'] == 'skin' and calls == ['skin']
+    # Without a declared task the guess is only context for the LLM, however confident
+    assert not triage.can_answer(prediction, '')
+    assert not triage.can_answer(prediction, '', None)
+    assert 'LOCAL CLASSIFIER RESULT' in triage.context_part(prediction)['text']
+
+
+def test_counters_track_latency_and_tokens_per_path():
+    triage, _ = make_triage('answer')
+    triage.record('local_template', 0.02)
+    triage.record('llm', 1.5, types.SimpleNamespace(prompt_token_count=300, candidates_token_count=80))
+    paths = triage.metrics()['paths']
+    assert paths['local_template']['tokens_per_request'] == 0
+    assert paths['llm']['tokens_per_request'] == 380 and paths['llm']['latency_ms']['p50'] == 1500
@@ -1,18 +1,76 @@
+import io
 import os
+import sys
 from flask import Flask, render_template, request
-from keras.models import load_model
-from keras.preprocessing import image
 import numpy as np
-from werkzeug.utils import secure_filename
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BASE_DIR))
+
+from common.model_registry import ModelRegistry, parse_routing
+from common.tta import TTAPredictor
+from common import preprocess, services
+from common.jobs import create_job_blueprint
+from common.upload_store import create_upload_blueprint
+from common.profiling import profiler_from_env, init_profiling
 
 app = Flask(__name__)
 
-# Load model
-model = load_model("models/brain_tumor_model.h5")
+# Opt-in stage timers (/metrics), sampled request profiles and /debug/profile (PROFILING=on)
+profiler = init_profiling(app, profiler_from_env())
+
+# Load model (versioned artifacts under models/brain_tumor/, old single file as fallback)
+MODEL_NAME = "brain_tumor"
+registry = ModelRegistry(
+    os.path.join(BASE_DIR, "models"),
+    legacy_paths={MODEL_NAME: os.path.join(BASE_DIR, "models", "brain_tumor_model.h5")},
+    routing={MODEL_NAME: parse_routing(os.getenv("MRI_MODEL_ROUTING"))},
+)
+registry.load(MODEL_NAME)
+registry.start_watcher(int(os.getenv("MODEL_POLL_SECONDS", "30")))
+
+# Opt-in test-time augmentation (TTA_MODE=on, or tta=1 in the form); falls back to
+# a single forward pass when over the latency budget or under load
+TTA_MODE = os.getenv("TTA_MODE", "off") == "on"
+tta = TTAPredictor(128, budget_ms=float(os.getenv("TTA_BUDGET_MS", "250")),
+                   max_inflight=int(os.getenv("TTA_MAX_INFLIGHT", "4")))
+
+# Preallocated float32 input buffers reused across requests (one per concurrent prediction)
+buffers = preprocess.BufferPool(128, count=int(os.getenv("PREPROCESS_BUFFERS", "8")))
+
+tumor_types = ["glioma", "meningioma", "no tumor", "pituitary"]
 
-# Ensure uploads folder exists
-UPLOAD_FOLDER = "static/uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+def predict_image(source, use_tta=TTA_MODE, key=None):
+    """Classify an image path or file-like object"""
+    # Preprocess image
+    with profiler.stage("decode"):
+        img = preprocess.decode(source, 128)
+
+    # Predict (pixels are scaled into a pooled buffer that is reused once the prediction is back)
+    model_version, model = registry.get(MODEL_NAME, key=key)
+    with buffers.lease() as buffer:
+        with profiler.stage("normalize"):
+            img_array = buffer.fill(img)
+        with profiler.stage("predict"):
+            predictions, used_tta = tta.predict(model, img_array, tta=use_tta)
+    return {
+        "class": tumor_types[np.argmax(predictions)],
+        "confidence": round(100 * float(np.max(predictions)), 2),
+        "model_version": model_version,
+        "tta": used_tta,
+    }
+
+def run_job(task, payload, tta=TTA_MODE):
+    return predict_image(io.BytesIO(payload), use_tta=tta)
+
+# Async jobs: POST /api/jobs returns a job id; poll /api/jobs/<id> or stream /api/jobs/<id>/stream
+# (the worker pool is shared with the other classifiers when mounted in the gateway)
+jobs = services.job_queue("mri", run_job)
+app.register_blueprint(create_job_blueprint(jobs, "mri"))
+
+# Uploads are stored by content hash in sharded folders, bounded by size/age
+uploads = services.upload_store(os.path.join(BASE_DIR, "static", "uploads"))
+app.register_blueprint(create_upload_blueprint(uploads))
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -21,26 +79,20 @@ def index():
     file_path = None
 
     if request.method == "POST":
-        file = request.files["file"]
+        with profiler.stage("parse"):
+            file = request.files["file"]
         if file:
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(filepath)
-
-            # Preprocess image
-            img = image.load_img(filepath, target_size=(128, 128))
-            img_array = image.img_to_array(img)
-            img_array = np.expand_dims(img_array, axis=0) / 255.0
-
-            # Predict
-            predictions = model.predict(img_array)
-            tumor_types = ["glioma", "meningioma", "no tumor", "pituitary"]
-            predicted_class = np.argmax(predictions)
-            result = f"Tumor Type: {tumor_types[predicted_class]}"
-            confidence = round(100 * np.max(predictions), 2)
+            with profiler.stage("save"):
+                stored = uploads.save(file, file.filename)
+            filepath = uploads.path(stored)
+
+            use_tta = request.form.get("tta", "1" if TTA_MODE else "0") == "1"
+            prediction = predict_image(filepath, use_tta, key=request.remote_addr)
+            result = f"Tumor Type: {prediction['class']}"
+            confidence = prediction["confidence"]
 
             # relative path for HTML
-            file_path = f"uploads/{filename}"
+            file_path = stored
 
     return render_template("index.html", result=result, confidence=confidence, file_path=file_path)
 
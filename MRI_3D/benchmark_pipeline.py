@@ -0,0 +1,107 @@
+import argparse
+import json
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from data_pipeline import build_dataset
+
+# CONFIG (matches model.py)
+IMAGE_SIZE = 128
+BATCH_SIZE = 20
+TRAIN_DIR = "data/Training"
+CACHE_DIR = "data/.cache"
+
+
+def legacy_generator(directory, image_size, batch_size):
+    """The ImageDataGenerator pipeline model.py used before tf.data"""
+    datagen = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=15,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        zoom_range=0.2,
+        horizontal_flip=True
+    )
+    return datagen.flow_from_directory(
+        directory,
+        target_size=(image_size, image_size),
+        batch_size=batch_size,
+        class_mode='sparse'
+    )
+
+
+def build_step(image_size, num_classes):
+    """A compiled train step on a small CNN so the benchmark measures input stalls, not VGG16"""
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(image_size, image_size, 3)),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(num_classes, activation='softmax'),
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy')
+    return model.train_on_batch
+
+
+def run_epoch(batches, steps, train_step):
+    """Time one epoch, splitting wall-clock into waiting for input vs computing"""
+    iterator = iter(batches)
+    wait = compute = 0.0
+    images = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        t0 = time.perf_counter()
+        try:
+            x, y = next(iterator)
+        except StopIteration:
+            break
+        t1 = time.perf_counter()
+        train_step(x, y)
+        t2 = time.perf_counter()
+        wait += t1 - t0
+        compute += t2 - t1
+        images += len(y)
+    total = time.perf_counter() - start
+    return {
+        'epoch_seconds': round(total, 3),
+        'input_wait_seconds': round(wait, 3),
+        'stall_percent': round(100 * wait / total, 1) if total else 0.0,
+        'images_per_second': round(images / total, 1) if total else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ImageDataGenerator with the tf.data input pipeline")
+    parser.add_argument('--data', default=TRAIN_DIR)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="empty string caches in memory")
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+
+    generator = legacy_generator(args.data, IMAGE_SIZE, args.batch_size)
+    steps = int(np.ceil(generator.samples / args.batch_size))
+    train_step = build_step(IMAGE_SIZE, generator.num_classes)
+    results['generator'] = [run_epoch(generator, steps, train_step) for _ in range(args.epochs)]
+
+    dataset, _, class_names = build_dataset(
+        args.data, IMAGE_SIZE, args.batch_size, training=True, cache_dir=args.cache_dir or None
+    )
+    train_step = build_step(IMAGE_SIZE, len(class_names))
+    results['tf.data'] = [run_epoch(dataset, steps, train_step) for _ in range(args.epochs)]
+
+    print(f"{'pipeline':<10} {'epoch':>5} {'seconds':>9} {'stall %':>8} {'img/s':>9}")
+    for name, epochs in results.items():
+        for i, epoch in enumerate(epochs, 1):
+            print(f"{name:<10} {i:>5} {epoch['epoch_seconds']:>9} {epoch['stall_percent']:>8} {epoch['images_per_second']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,46 @@
 import os
-import zipfile
-import platform
-import subprocess
+import sys
+import argparse
 
-def download_dataset():
-    # Kaggle command (user must have kaggle CLI installed & configured)
-    kaggle_cmd = "kaggle"       #r"C:\Users\ASUS\anaconda3\Scripts\kaggle.exe"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_cache import build_cache
+from downloader import fetch, KaggleSource, HttpSource, LocalFileSource
 
-    dataset = "masoudnickparvar/brain-tumor-mri-dataset"
+DATASET = "masoudnickparvar/brain-tumor-mri-dataset"
+ZIP_NAME = "brain-tumor-mri-dataset.zip"
+
+
+def make_source(location=None):
+    """Kaggle by default; an http(s) URL or local archive path can stand in for it"""
+    if not location:
+        # Credentials come from ~/.kaggle/kaggle.json or KAGGLE_USERNAME/KAGGLE_KEY
+        return KaggleSource(DATASET)
+    if location.startswith(("http://", "https://")):
+        return HttpSource(location)
+    return LocalFileSource(location)
 
-    # Save in current script directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    out_dir = base_dir
-    zip_path = os.path.join(out_dir, "brain-tumor-mri-dataset.zip")
 
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
+def download_dataset(location=None, sha256=None, workers=None):
+    # Save in current script directory
+    out_dir = os.path.dirname(os.path.abspath(__file__))
 
     print("⬇Downloading dataset...")
     try:
-        subprocess.run(
-            [kaggle_cmd, "datasets", "download", "-d", dataset, "-p", out_dir, "--unzip"],
-            check=True
-        )
+        # Resumes a partial download, verifies it, and extracts only changed files
+        # straight into data/Training and data/Testing
+        fetch(make_source(location), out_dir, ZIP_NAME, expected_sha256=sha256, workers=workers)
     except Exception as e:
         print(f"Error while downloading: {e}")
         return
 
-    extracted_folder = os.path.join(out_dir, "Brain Tumor MRI Dataset")
-    if os.path.exists(extracted_folder):
-        print(f"Dataset is ready at: {extracted_folder}")
-        return
-
-    if os.path.exists(zip_path):
-        print("Extracting dataset manually...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(out_dir)
-        os.remove(zip_path)
-        print(f"Dataset download")
+    # One-time conversion to memory-mapped shards (only changed images are re-decoded)
+    print("Building preprocessed dataset cache...")
+    build_cache(out_dir, os.path.join(out_dir, ".cache", "shards"))
 
 if __name__ == "__main__":
-    download_dataset()
+    parser = argparse.ArgumentParser(description="Download the Brain Tumor MRI dataset")
+    parser.add_argument("--source", help="archive URL or local path instead of Kaggle")
+    parser.add_argument("--sha256", help="expected SHA-256 of the archive")
+    parser.add_argument("--workers", type=int, help="parallel extraction threads")
+    args = parser.parse_args()
+    download_dataset(args.source, args.sha256, args.workers)
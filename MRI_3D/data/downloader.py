@@ -0,0 +1,301 @@
+import io
+import os
+import json
+import base64
+import hashlib
+import zipfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1 << 20
+# Archive folders that mark the start of the training layout (data/Training, data/Testing)
+LAYOUT_ROOTS = ("Training", "Testing")
+
+
+class LocalFileSource:
+    """A file on disk standing in for the remote archive (tests, pre-seeded nodes)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def version(self):
+        stat = os.stat(self.path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def open(self, start=0, version=None):
+        """Return (stream, offset the stream starts at, version of the file).
+
+        A resume (start > 0) starts over when version no longer matches the file.
+        """
+        current = self.version()
+        if version is not None and version != current:
+            start = 0
+        f = open(self.path, 'rb')
+        f.seek(start)
+        return f, start, current
+
+
+class HttpSource:
+    """Plain HTTP(S) download that resumes with Range requests when the server allows it"""
+
+    def __init__(self, url, headers=None, timeout=60):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+    def size(self):
+        request = urllib.request.Request(self.url, headers=self.headers, method='HEAD')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                length = response.headers.get('Content-Length')
+                return int(length) if length else None
+        except Exception:
+            return None
+
+    def open(self, start=0, version=None):
+        """Return (stream, offset, ETag or Last-Modified); a resume is sent with If-Range: version"""
+        headers = dict(self.headers)
+        if start:
+            headers['Range'] = f"bytes={start}-"
+            if version:
+                headers['If-Range'] = version
+        try:
+            response = urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if not (start and e.code == 416):
+                raise
+            # Range not satisfiable: the .part already holds the whole file (killed before
+            # the rename) when the server's total matches it; otherwise start over
+            content_range = e.headers.get('Content-Range', '')
+            total = content_range.rsplit('/', 1)[-1]
+            total = int(total) if total.isdigit() else self.size()
+            current = response_version(e.headers)
+            e.close()
+            if total == start and (version is None or current in (None, version)):
+                return io.BytesIO(), start, version
+            return self.open(0)
+        current = response_version(response.headers)
+        # 200 instead of 206 means the server ignored the range or If-Range saw a new file; start over
+        if start and response.status != 206:
+            return response, 0, current
+        # A server that ignores If-Range still tells us the file changed
+        if start and version and current != version:
+            response.close()
+            return self.open(0)
+        return response, start, current
+
+
+def response_version(headers):
+    """What identifies this revision of the remote file: a strong ETag, else Last-Modified"""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+class KaggleSource(HttpSource):
+    """Kaggle dataset archive, authenticated from ~/.kaggle/kaggle.json or KAGGLE_USERNAME/KAGGLE_KEY"""
+
+    API_URL = "https://www.kaggle.com/api/v1/datasets/download/{dataset}"
+
+    def __init__(self, dataset, timeout=60):
+        username, key = os.getenv('KAGGLE_USERNAME'), os.getenv('KAGGLE_KEY')
+        config_path = os.path.join(os.path.expanduser('~'), '.kaggle', 'kaggle.json')
+        if not (username and key) and os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            username, key = config.get('username'), config.get('key')
+
+        headers = {}
+        if username and key:
+            token = base64.b64encode(f"{username}:{key}".encode('utf-8')).decode('ascii')
+            headers['Authorization'] = f"Basic {token}"
+        super().__init__(self.API_URL.format(dataset=dataset), headers, timeout)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(source, dest, expected_sha256=None):
+    """Download source to dest, resuming a previous dest.part; returns the archive's SHA-256.
+
+    A dest.part is only resumed when the source still reports the version (ETag,
+    Last-Modified or local size/mtime) it was started from; otherwise, or when no
+    version was recorded and there is no expected hash to catch a stale part, the
+    download starts over.
+
+    An existing dest is kept when it matches the expected hash (or, without one,
+    the source size), so re-runs don't download anything. When neither can be
+    checked it is downloaded again rather than trusted forever.
+    """
+    if os.path.exists(dest):
+        if expected_sha256:
+            sha = file_sha256(dest)
+            if sha == expected_sha256:
+                return sha
+        else:
+            size = source.size()
+            if size == os.path.getsize(dest):
+                return file_sha256(dest)
+            if size is None:
+                print(f"Source size unknown, cannot tell whether {dest} is current; downloading again "
+                      "(pass the archive's SHA-256 to skip unchanged downloads)")
+
+    # dest.part.version records which revision of the source the partial file came from
+    part = dest + '.part'
+    version_path = part + '.version'
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    version = None
+    if offset and os.path.exists(version_path):
+        with open(version_path) as f:
+            version = f.read().strip() or None
+    if offset and version is None and not expected_sha256:
+        print("Partial download has no recorded source version and no checksum to verify it, starting over")
+        offset = 0
+    stream, offset, version = source.open(offset, version)
+    if version:
+        with open(version_path, 'w') as f:
+            f.write(version)
+    elif os.path.exists(version_path):
+        os.remove(version_path)
+
+    digest = hashlib.sha256()
+    with stream, open(part, 'ab' if offset else 'wb') as out:
+        if offset:
+            print(f"Resuming download at {offset} bytes")
+            with open(part, 'rb') as existing:
+                for block in iter(lambda: existing.read(CHUNK_SIZE), b''):
+                    digest.update(block)
+        for block in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            out.write(block)
+            digest.update(block)
+
+    sha = digest.hexdigest()
+    if os.path.exists(version_path):
+        os.remove(version_path)
+    if expected_sha256 and sha != expected_sha256:
+        os.remove(part)
+        raise ValueError(f"Checksum mismatch for {dest}: expected {expected_sha256}, got {sha}")
+    os.replace(part, dest)
+    return sha
+
+
+def layout_path(member_name):
+    """Map an archive member onto the training layout, e.g. 'X/Training/glioma/1.jpg' -> 'Training/glioma/1.jpg'"""
+    parts = [p for p in member_name.replace('\\', '/').split('/') if p]
+    if not parts or any(p == '..' for p in parts) or member_name.startswith('/'):
+        raise ValueError(f"Unsafe path in archive: {member_name}")
+    for i, part in enumerate(parts):
+        if part in LAYOUT_ROOTS:
+            return '/'.join(parts[i:])
+    return '/'.join(parts)
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {'archive_sha256': None, 'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def extract(zip_path, out_dir, manifest_path=None, workers=None, archive_sha256=None):
+    """Extract members in parallel into the training layout and record them in a manifest.
+
+    Members whose CRC and size match the manifest (and whose file is still on disk)
+    are skipped; files from the previous manifest that are no longer in the archive
+    are deleted. Returns (extracted, skipped) counts.
+    """
+    manifest_path = manifest_path or os.path.join(out_dir, 'download_manifest.json')
+    manifest = load_manifest(manifest_path)
+    previous = manifest['files']
+
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+
+    todo, files, skipped = [], {}, 0
+    for info in members:
+        rel = layout_path(info.filename)
+        target = os.path.join(out_dir, *rel.split('/'))
+        old = previous.get(rel)
+        if old and old['crc'] == info.CRC and old['size'] == info.file_size \
+                and os.path.exists(target) and os.path.getsize(target) == info.file_size:
+            files[rel] = old
+            skipped += 1
+        else:
+            todo.append((info, rel, target))
+
+    # zipfile handles aren't safe to share between threads, so each worker opens its own
+    local = threading.local()
+    handles = []
+
+    def extract_member(item):
+        info, rel, target = item
+        if not hasattr(local, 'archive'):
+            local.archive = zipfile.ZipFile(zip_path)
+            handles.append(local.archive)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        digest = hashlib.sha256()
+        tmp = target + '.tmp'
+        with local.archive.open(info) as src, open(tmp, 'wb') as dst:
+            for block in iter(lambda: src.read(CHUNK_SIZE), b''):
+                dst.write(block)
+                digest.update(block)
+        os.replace(tmp, target)
+        return rel, {'crc': info.CRC, 'size': info.file_size, 'sha256': digest.hexdigest()}
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for rel, entry in pool.map(extract_member, todo):
+                files[rel] = entry
+    finally:
+        for handle in handles:
+            handle.close()
+
+    # Members that left the archive would otherwise linger in data/Training and data/Testing
+    for rel in set(previous) - set(files):
+        try:
+            os.remove(os.path.join(out_dir, *rel.split('/')))
+        except FileNotFoundError:
+            pass
+
+    manifest['files'] = files
+    manifest['archive_sha256'] = archive_sha256
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+    return len(todo), skipped
+
+
+def fetch(source, out_dir, zip_name, expected_sha256=None, workers=None, keep_archive=True):
+    """Download (resuming) and extract an archive; skips extraction when the archive is unchanged"""
+    os.makedirs(out_dir, exist_ok=True)
+    zip_path = os.path.join(out_dir, zip_name)
+    manifest_path = os.path.join(out_dir, 'download_manifest.json')
+
+    sha = download(source, zip_path, expected_sha256)
+    manifest = load_manifest(manifest_path)
+    if manifest.get('archive_sha256') == sha and all(
+        os.path.exists(os.path.join(out_dir, *rel.split('/'))) for rel in manifest['files']
+    ):
+        print("Archive unchanged, nothing to extract")
+        extracted, skipped = 0, len(manifest['files'])
+    else:
+        extracted, skipped = extract(zip_path, out_dir, manifest_path, workers, archive_sha256=sha)
+
+    if not keep_archive:
+        os.remove(zip_path)
+    print(f"Extracted {extracted} files, {skipped} unchanged")
+    return extracted, skipped
+
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# Downloader tests (local file and in-process HTTP stand-ins, no network)
+
+import os
+import sys
+import hashlib
+import zipfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from downloader import download, extract, fetch, layout_path, LocalFileSource, HttpSource
+
+PAYLOAD = os.urandom(300_000)
+
+
+def serve(payload, honour_range=True, etag=None):
+    """Start a throwaway HTTP server for payload; returns (url, list of Range headers seen, server)"""
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested = self.headers.get('Range')
+            ranges.append(requested)
+            if_range = self.headers.get('If-Range')
+            fresh = if_range is None or if_range == etag
+            start = int(requested[6:-1]) if requested and honour_range and fresh else 0
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(payload)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206 if start else 200)
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(payload) - start))
+            self.end_headers()
+            self.wfile.write(payload[start:])
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/data.zip", ranges, server
+
+
+def test_http_download_resumes_partial_file(tmp_path):
+    url, ranges, server = serve(PAYLOAD)
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(PAYLOAD[:1000])
+    try:
+        sha = download(HttpSource(url), dest, hashlib.sha256(PAYLOAD).hexdigest())
+    finally:
+        server.shutdown()
+    assert ranges == ['bytes=1000-']
+    assert sha == hashlib.sha256(PAYLOAD).hexdigest()
+    assert open(dest, 'rb').read() == PAYLOAD
+
+
+def test_http_download_resumes_same_version_without_checksum(tmp_path):
+    url, ranges, server = serve(PAYLOAD, etag='"v2"')
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(PAYLOAD[:1000])
+    with open(dest + '.part.version', 'w') as f:
+        f.write('"v2"')
+    try:
+        download(HttpSource(url), dest)
+    finally:
+        server.shutdown()
+    assert ranges == ['bytes=1000-']
+    assert open(dest, 'rb').read() == PAYLOAD and not os.path.exists(dest + '.part.version')
+
+
+def test_http_download_restarts_stale_part(tmp_path):
+    url, ranges, server = serve(PAYLOAD, etag='"v2"')
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(b'x' * 1000)    # left over from an older dataset version
+    with open(dest + '.part.version', 'w') as f:
+        f.write('"v1"')
+    try:
+        download(HttpSource(url), dest)
+    finally:
+        server.shutdown()
+    assert ranges == ['bytes=1000-']    # If-Range made the server send the whole new file
+    assert open(dest, 'rb').read() == PAYLOAD
+
+
+def test_unversioned_part_without_checksum_starts_over(tmp_path):
+    url, ranges, server = serve(PAYLOAD)
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(b'x' * 1000)
+    try:
+        download(HttpSource(url), dest)
+    finally:
+        server.shutdown()
+    assert ranges == [None]
+    assert open(dest, 'rb').read() == PAYLOAD
+
+
+def test_local_part_from_a_changed_file_starts_over(tmp_path):
+    source_path = tmp_path / 'source.zip'
+    source_path.write_bytes(PAYLOAD)
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(b'x' * 1000)
+    with open(dest + '.part.version', 'w') as f:
+        f.write('0-0')
+    download(LocalFileSource(str(source_path)), dest)
+    assert open(dest, 'rb').read() == PAYLOAD
+
+
+def test_http_download_restarts_when_range_ignored(tmp_path):
+    url, _, server = serve(PAYLOAD, honour_range=False)
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(b'stale bytes')
+    try:
+        download(HttpSource(url), dest)
+    finally:
+        server.shutdown()
+    assert open(dest, 'rb').read() == PAYLOAD
+
+
+def test_http_download_finishes_complete_part_file(tmp_path):
+    url, ranges, server = serve(PAYLOAD)
+    dest = str(tmp_path / 'data.zip')
+    with open(dest + '.part', 'wb') as f:
+        f.write(PAYLOAD)
+    try:
+        sha = download(HttpSource(url), dest, hashlib.sha256(PAYLOAD).hexdigest())
+    finally:
+        server.shutdown()
+    assert ranges == [f"bytes={len(PAYLOAD)}-"]
+    assert sha == hashlib.sha256(PAYLOAD).hexdigest()
+    assert open(dest, 'rb').read() == PAYLOAD and not os.path.exists(dest + '.part')
+
+
+class SizelessSource(LocalFileSource):
+    """A source whose size can't be queried, like a server that refuses HEAD"""
+
+    def size(self):
+        return None
+
+
+def test_unknown_source_size_downloads_again(tmp_path):
+    source_path = tmp_path / 'source.zip'
+    source_path.write_bytes(PAYLOAD)
+    dest = tmp_path / 'data.zip'
+    dest.write_bytes(b'older archive')
+    download(SizelessSource(str(source_path)), str(dest))
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_checksum_mismatch_is_rejected(tmp_path):
+    source_path = tmp_path / 'source.zip'
+    source_path.write_bytes(PAYLOAD)
+    dest = str(tmp_path / 'data.zip')
+    with pytest.raises(ValueError):
+        download(LocalFileSource(str(source_path)), dest, expected_sha256='0' * 64)
+    assert not os.path.exists(dest) and not os.path.exists(dest + '.part')
+
+
+def make_archive(path, members):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+def test_extract_into_layout_and_skip_unchanged(tmp_path):
+    archive = str(tmp_path / 'data.zip')
+    out_dir = str(tmp_path / 'data')
+    make_archive(archive, {
+        'Brain Tumor MRI Dataset/Training/glioma/1.jpg': b'a',
+        'Brain Tumor MRI Dataset/Testing/notumor/2.jpg': b'b',
+    })
+    assert extract(archive, out_dir, workers=2) == (2, 0)
+    assert open(os.path.join(out_dir, 'Training', 'glioma', '1.jpg'), 'rb').read() == b'a'
+
+    make_archive(archive, {
+        'Brain Tumor MRI Dataset/Training/glioma/1.jpg': b'changed',
+        'Brain Tumor MRI Dataset/Testing/notumor/2.jpg': b'b',
+    })
+    assert extract(archive, out_dir, workers=2) == (1, 1)
+    assert open(os.path.join(out_dir, 'Training', 'glioma', '1.jpg'), 'rb').read() == b'changed'
+
+
+def test_extract_removes_files_dropped_from_archive(tmp_path):
+    archive = str(tmp_path / 'data.zip')
+    out_dir = str(tmp_path / 'data')
+    make_archive(archive, {'Training/glioma/1.jpg': b'a', 'Training/glioma/2.jpg': b'b'})
+    extract(archive, out_dir)
+
+    make_archive(archive, {'Training/glioma/1.jpg': b'a'})
+    assert extract(archive, out_dir) == (0, 1)
+    assert not os.path.exists(os.path.join(out_dir, 'Training', 'glioma', '2.jpg'))
+    assert os.path.exists(os.path.join(out_dir, 'Training', 'glioma', '1.jpg'))
+
+
+def test_fetch_skips_unchanged_archive(tmp_path):
+    source_path = str(tmp_path / 'source.zip')
+    make_archive(source_path, {'Training/glioma/1.jpg': b'a'})
+    out_dir = str(tmp_path / 'data')
+    assert fetch(LocalFileSource(source_path), out_dir, 'data.zip') == (1, 0)
+    assert fetch(LocalFileSource(source_path), out_dir, 'data.zip') == (0, 1)
+
+
+def test_layout_path_rejects_unsafe_members():
+    assert layout_path('X/Training/glioma/1.jpg') == 'Training/glioma/1.jpg'
+    with pytest.raises(ValueError):
+        layout_path('../../etc/passwd')
@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# CONFIG
+IMAGE_SIZE = 128
+SHARD_SIZE = 1024
+SPLITS = ("Training", "Testing")
+DATA_DIR = "data"
+CACHE_DIR = "data/.cache/shards"
+MANIFEST = "manifest.json"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+RESAMPLE = "nearest"    # matches keras load_img in the apps; stored in the manifest so a change rebuilds the shards
+
+
+def list_image_files(directory):
+    """Walk <directory>/<class>/<image> like flow_from_directory; classes sorted by name"""
+    class_names = sorted(
+        d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d))
+    )
+    paths, labels = [], []
+    for index, class_name in enumerate(class_names):
+        class_dir = os.path.join(directory, class_name)
+        for filename in sorted(os.listdir(class_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_dir, filename))
+                labels.append(index)
+    return paths, labels, class_names
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def decode_image(path, image_size):
+    """Decode to RGB and resize to a uint8 (size, size, 3) array, pixel-for-pixel like keras load_img"""
+    with Image.open(path) as img:
+        img = img.convert('RGB').resize((image_size, image_size), Image.NEAREST)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def load_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class CachedSplit:
+    """Read-only view over one split's shards; images stay memory-mapped on disk"""
+
+    def __init__(self, cache_dir, split, manifest=None):
+        manifest = manifest or load_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No dataset cache at {cache_dir}; run dataset_cache.py first")
+        info = manifest['splits'][split]
+        self.class_names = manifest['class_names']
+        self.image_size = manifest['image_size']
+        self.shard_size = manifest['shard_size']
+        self.files = info['files']
+        self.shards = [np.load(os.path.join(cache_dir, s['images']), mmap_mode='r') for s in info['shards']]
+        labels = [np.load(os.path.join(cache_dir, s['labels'])) for s in info['shards']]
+        self.labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def row(self, index):
+        """Zero-copy view of one image"""
+        return self.shards[index // self.shard_size][index % self.shard_size]
+
+    def take(self, indices, out=None):
+        """Gather a batch of images (one copy, into out if given)"""
+        indices = np.asarray(indices)
+        if out is None:
+            out = np.empty((len(indices), self.image_size, self.image_size, 3), dtype=np.uint8)
+        shard_ids = indices // self.shard_size
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            out[mask] = self.shards[shard_id][indices[mask] % self.shard_size]
+        return out
+
+
+def build_split(data_dir, cache_dir, split, image_size, shard_size, old_manifest, workers):
+    """Write one split's shards; returns (split manifest, class_names, decoded count)"""
+    paths, labels, class_names = list_image_files(os.path.join(data_dir, split))
+    split_dir = os.path.join(data_dir, split)
+
+    old_split = None
+    if old_manifest and old_manifest.get('image_size') == image_size and old_manifest.get('resample') == RESAMPLE \
+            and split in old_manifest['splits']:
+        old_split = CachedSplit(cache_dir, split, old_manifest)
+    old_files = old_split.files if old_split else {}
+    old_by_hash = {entry['sha256']: entry for entry in old_files.values()}
+
+    # Hash only files whose size/mtime changed since the last build
+    records = []
+    for path in paths:
+        rel = os.path.relpath(path, split_dir).replace(os.sep, '/')
+        stat = os.stat(path)
+        old = old_files.get(rel)
+        if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime_ns:
+            sha = old['sha256']
+        else:
+            sha = file_sha256(path)
+        records.append((rel, path, stat, sha))
+
+    tmp_dir = os.path.join(cache_dir, f"{split}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shards, files, decoded = [], {}, 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(records), shard_size):
+            chunk = records[start:start + shard_size]
+            shard_id = len(shards)
+            images_name = f"images-{shard_id:05d}.npy"
+            labels_name = f"labels-{shard_id:05d}.npy"
+            images = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, images_name), mode='w+', dtype=np.uint8,
+                shape=(len(chunk), image_size, image_size, 3)
+            )
+
+            # Unchanged content is copied from the old shards, everything else is decoded
+            to_decode = []
+            for i, (rel, path, stat, sha) in enumerate(chunk):
+                previous = old_by_hash.get(sha)
+                if previous is not None:
+                    images[i] = old_split.row(previous['shard'] * old_split.shard_size + previous['index'])
+                else:
+                    to_decode.append((i, path))
+            arrays = pool.map(lambda item: decode_image(item[1], image_size), to_decode)
+            for (i, _), array in zip(to_decode, arrays):
+                images[i] = array
+            decoded += len(to_decode)
+            images.flush()
+            del images
+
+            np.save(os.path.join(tmp_dir, labels_name), np.asarray(labels[start:start + shard_size], dtype=np.int64))
+            shards.append({'images': f"{split}/{images_name}", 'labels': f"{split}/{labels_name}", 'count': len(chunk)})
+            for i, (rel, path, stat, sha) in enumerate(chunk):
+                files[rel] = {'sha256': sha, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'shard': shard_id, 'index': i}
+
+    # Release the old memmaps before replacing their files
+    del old_split
+    final_dir = os.path.join(cache_dir, split)
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.replace(tmp_dir, final_dir)
+    return {'shards': shards, 'files': files}, class_names, decoded
+
+
+def build_cache(data_dir=DATA_DIR, cache_dir=CACHE_DIR, image_size=IMAGE_SIZE, shard_size=SHARD_SIZE,
+                splits=SPLITS, workers=None):
+    """Convert data/<split>/<class>/*.jpg into uint8 .npy shards plus a hashed manifest.
+
+    Re-running only decodes images whose content changed; the rest are copied from
+    the previous shards.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    old_manifest = load_manifest(cache_dir)
+    manifest = {'image_size': image_size, 'resample': RESAMPLE, 'shard_size': shard_size, 'class_names': None,
+                'splits': {}}
+    workers = workers or os.cpu_count()
+
+    for split in splits:
+        if not os.path.isdir(os.path.join(data_dir, split)):
+            print(f"Skipping missing split: {split}")
+            continue
+        split_manifest, class_names, decoded = build_split(
+            data_dir, cache_dir, split, image_size, shard_size, old_manifest, workers
+        )
+        manifest['splits'][split] = split_manifest
+        manifest['class_names'] = manifest['class_names'] or class_names
+        print(f"{split}: {len(split_manifest['files'])} images, {decoded} decoded")
+
+    tmp_path = os.path.join(cache_dir, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped MRI dataset cache")
+    parser.add_argument('--data', default=DATA_DIR)
+    parser.add_argument('--out', default=CACHE_DIR)
+    parser.add_argument('--size', type=int, default=IMAGE_SIZE)
+    args = parser.parse_args()
+    build_cache(args.data, args.out, args.size)
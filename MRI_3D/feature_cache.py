@@ -0,0 +1,120 @@
+import os
+import json
+import numpy as np
+import tensorflow as tf
+import keras
+
+from data_pipeline import build_augmenter
+
+AUTOTUNE = tf.data.AUTOTUNE
+FEATURE_DIR = "data/.cache/features"
+
+
+def split_model(model):
+    """Split a model.build_model() network into (frozen prefix, trainable head).
+
+    The cut sits right before the first VGG16 layer with trainable weights, so
+    weight-less layers such as block4_pool end up in the cached prefix. The head
+    reuses the original layer objects, so training it updates the full model.
+    """
+    base_model = model.layers[0]
+    cut = next(i for i, layer in enumerate(base_model.layers) if layer.trainable and layer.trainable_weights)
+    prefix = keras.Model(base_model.input, base_model.layers[cut - 1].output, name="frozen_prefix")
+
+    head_input = keras.Input(shape=prefix.output.shape[1:])
+    x = head_input
+    for layer in base_model.layers[cut:] + model.layers[1:]:
+        x = layer(x)
+    head = keras.Model(head_input, x, name="trainable_head")
+    return prefix, head
+
+
+class CachedFeatures:
+    """Prefix activations for one split: float16 (views * N, ...) memmap plus labels"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.features = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(path, "labels.npy"))
+        self.views = self.meta["views"]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def dataset(self, batch_size, training=False):
+        """Batches of cached features; when training each image gets one random view per epoch"""
+        count = len(self)
+        shape = self.features.shape[1:]
+
+        def batches():
+            order = np.random.permutation(count) if training else np.arange(count)
+            for start in range(0, count, batch_size):
+                indices = order[start:start + batch_size]
+                rows = indices
+                if training and self.views > 1:
+                    rows = np.random.randint(self.views, size=len(indices)) * count + indices
+                # Sorted reads keep memmap access sequential-ish
+                sort = np.argsort(rows)
+                batch = np.empty((len(rows),) + shape, dtype=np.float16)
+                batch[sort] = self.features[rows[sort]]
+                yield batch, self.labels[indices]
+
+        ds = tf.data.Dataset.from_generator(batches, output_signature=(
+            tf.TensorSpec(shape=(None,) + shape, dtype=tf.float16),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+        ))
+        ds = ds.map(lambda x, y: (tf.cast(x, tf.float32), y), num_parallel_calls=AUTOTUNE)
+        return ds.prefetch(AUTOTUNE)
+
+
+def cache_features(prefix, dataset, labels, path, augment_passes=0, fingerprint=None):
+    """Run the frozen prefix once over a non-augmented dataset and store its activations.
+
+    augment_passes > 0 adds that many fixed, randomly augmented views of every image.
+    An existing cache for the same prefix, pass count and data fingerprint is reused.
+    """
+    count = len(labels)
+    views = 1 + augment_passes
+    meta = {"prefix_output": prefix.layers[-1].name, "count": count, "views": views, "fingerprint": fingerprint}
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return CachedFeatures(path)
+
+    os.makedirs(path, exist_ok=True)
+    shape = tuple(prefix.output.shape[1:])
+    features = np.lib.format.open_memmap(
+        os.path.join(path, "features.npy"), mode="w+", dtype=np.float16, shape=(views * count,) + shape
+    )
+    augmenter = build_augmenter()
+    for view in range(views):
+        row = view * count
+        for x, _ in dataset:
+            if view > 0:
+                x = augmenter(x, training=True)
+            out = prefix.predict_on_batch(x)
+            features[row:row + len(out)] = np.asarray(out, dtype=np.float16)
+            row += len(out)
+        print(f"Cached view {view + 1}/{views} of {count} images")
+    features.flush()
+    del features
+
+    np.save(os.path.join(path, "labels.npy"), np.asarray(labels, dtype=np.int64))
+    # meta.json goes last so an interrupted run is never mistaken for a complete cache
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return CachedFeatures(path)
+
+
+def load_features(prefix, load_split, split, batch_size, augment_passes=0, feature_dir=FEATURE_DIR,
+                  fingerprint=None):
+    """Cache (or reuse) prefix activations for a split, using model.load_split for the images.
+
+    fingerprint (e.g. model.split_fingerprint(split)) invalidates the cache when the images change.
+    """
+    dataset, labels, _ = load_split(split, batch_size, training=False)
+    path = os.path.join(feature_dir, f"{split}-{prefix.layers[-1].name}-aug{augment_passes}")
+    return cache_features(prefix, dataset, labels, path, augment_passes if split == "Training" else 0,
+                          fingerprint=fingerprint)
@@ -1,4 +1,7 @@
 import os
+import sys
+import json
+import hashlib
 import numpy as np
 from sklearn.metrics import classification_report
 
@@ -6,90 +9,124 @@ from tensorflow.keras.applications import VGG16
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Input, Flatten, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.model_registry import ModelRegistry
+from common.evaluation import compute_metrics, print_report
+from data_pipeline import build_dataset, build_cached_dataset, file_list_fingerprint
+from dataset_cache import load_manifest, list_image_files, RESAMPLE
 
 # CONFIG
 IMAGE_SIZE = 128
 BATCH_SIZE = 20
 EPOCHS = 5
+TRAINABLE_LAYERS = 5
 TRAIN_DIR = "data/Training"
 TEST_DIR = "data/Testing"
-MODEL_PATH = "models/brain_tumor_vgg16.h5"
-
-# DATA GENERATORS
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=15,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    zoom_range=0.2,
-    horizontal_flip=True
-)
-
-test_datagen = ImageDataGenerator(rescale=1./255)
-
-train_generator = train_datagen.flow_from_directory(
-    TRAIN_DIR,
-    target_size=(IMAGE_SIZE, IMAGE_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode='sparse'
-)
-
-test_generator = test_datagen.flow_from_directory(
-    TEST_DIR,
-    target_size=(IMAGE_SIZE, IMAGE_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode='sparse',
-    shuffle=False
-)
-
-class_labels = list(train_generator.class_indices.keys())
-print("Class Labels:", class_labels)
-
-# MODEL ARCHITECTURE
-base_model = VGG16(weights="imagenet", include_top=False, input_shape=(IMAGE_SIZE, IMAGE_SIZE, 3))
-
-# Freeze all layers
-for layer in base_model.layers:
-    layer.trainable = False
-
-# Unfreeze last few layers
-for layer in base_model.layers[-5:]:
-    layer.trainable = True
-
-model = Sequential([
-    Input(shape=(IMAGE_SIZE, IMAGE_SIZE, 3)),
-    base_model,
-    Flatten(),
-    Dense(256, activation='relu'),
-    Dropout(0.2),
-    Dense(len(class_labels), activation='softmax')
-])
-
-model.compile(optimizer=Adam(learning_rate=0.0001),
-              loss="sparse_categorical_crossentropy",
-              metrics=["accuracy"])
-
-model.summary()
-
-# TRAINING
-history = model.fit(
-    train_generator,
-    epochs=EPOCHS,
-    validation_data=test_generator
-)
-
-# EVALUATION
-y_true = test_generator.classes
-y_pred = model.predict(test_generator)
-y_pred_classes = np.argmax(y_pred, axis=1)
-
-print("\nClassification Report:")
-print(classification_report(y_true, y_pred_classes, target_names=class_labels))
-
-# SAVE MODEL
-if not os.path.exists("models"):
-    os.makedirs("models")
-
-model.save(MODEL_PATH)
-print(f"\n Model saved at {MODEL_PATH}")
+CACHE_DIR = "data/.cache"
+SHARD_DIR = "data/.cache/shards"
+MODEL_DIR = "models"
+MODEL_NAME = "brain_tumor"   # app.py serves the newest models/brain_tumor/v<N>.keras
+
+
+def load_split(split, batch_size=BATCH_SIZE, training=False):
+    """Return (dataset, labels, class_labels) for the Training or Testing split"""
+    # Memory-mapped shards when dataset_cache.py has run, else decode the JPEGs
+    if load_manifest(SHARD_DIR):
+        return build_cached_dataset(SHARD_DIR, split, batch_size, training=training)
+    directory = TRAIN_DIR if split == "Training" else TEST_DIR
+    return build_dataset(directory, IMAGE_SIZE, batch_size, training=training, cache_dir=CACHE_DIR)
+
+
+def split_fingerprint(split):
+    """Content fingerprint of a split: the shard manifest's hashes if present, else the file list"""
+    manifest = load_manifest(SHARD_DIR)
+    if manifest and split in manifest['splits']:
+        files = sorted((rel, entry['sha256']) for rel, entry in manifest['splits'][split]['files'].items())
+        return hashlib.sha256(json.dumps([manifest.get('resample'), files]).encode('utf-8')).hexdigest()[:16]
+    directory = TRAIN_DIR if split == "Training" else TEST_DIR
+    return f"{RESAMPLE}-{file_list_fingerprint(list_image_files(directory)[0])}"
+
+
+def load_data(batch_size=BATCH_SIZE):
+    """Return (train_ds, test_ds, test_labels, class_labels)"""
+    train_ds, _, class_labels = load_split("Training", batch_size, training=True)
+    test_ds, test_labels, _ = load_split("Testing", batch_size)
+    return train_ds, test_ds, test_labels, class_labels
+
+
+def build_model(num_classes):
+    """VGG16 with all but the last TRAINABLE_LAYERS frozen, plus a small dense head"""
+    base_model = VGG16(weights="imagenet", include_top=False, input_shape=(IMAGE_SIZE, IMAGE_SIZE, 3))
+
+    # Freeze all layers
+    for layer in base_model.layers:
+        layer.trainable = False
+
+    # Unfreeze last few layers
+    for layer in base_model.layers[-TRAINABLE_LAYERS:]:
+        layer.trainable = True
+
+    return Sequential([
+        Input(shape=(IMAGE_SIZE, IMAGE_SIZE, 3)),
+        base_model,
+        Flatten(),
+        Dense(256, activation='relu'),
+        Dropout(0.2),
+        # Softmax stays float32 even under a mixed-precision policy
+        Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+
+
+def compile_model(model, gradient_accumulation_steps=None, jit_compile="auto"):
+    optimizer = Adam(learning_rate=0.0001, gradient_accumulation_steps=gradient_accumulation_steps)
+    model.compile(optimizer=optimizer,
+                  loss="sparse_categorical_crossentropy",
+                  metrics=["accuracy"],
+                  jit_compile=jit_compile)
+
+
+def evaluate(model, test_ds, test_labels, class_labels):
+    y_true = np.array(test_labels)
+    y_pred = model.predict(test_ds)
+    y_pred_classes = np.argmax(y_pred, axis=1)
+
+    print("\nClassification Report:")
+    print(classification_report(y_true, y_pred_classes, target_names=class_labels))
+
+    # Confusion matrix, top-k, calibration and bootstrap CIs
+    print_report(compute_metrics(y_pred, y_true, class_labels), class_labels)
+
+
+def save_model(model):
+    """Save as the next version; a running app hot-swaps to it"""
+    model_path = ModelRegistry(MODEL_DIR).next_version_path(MODEL_NAME)
+    # Write under a name the registry's watcher ignores, then rename, so it never loads a partial file
+    directory, filename = os.path.split(model_path)
+    tmp_path = os.path.join(directory, f".{filename}.tmp.keras")
+    model.save(tmp_path)
+    os.replace(tmp_path, model_path)
+    print(f"\n Model saved at {model_path}")
+    return model_path
+
+
+if __name__ == "__main__":
+    train_ds, test_ds, test_labels, class_labels = load_data()
+    print("Class Labels:", class_labels)
+
+    model = build_model(len(class_labels))
+    compile_model(model)
+    model.summary()
+
+    # TRAINING
+    history = model.fit(
+        train_ds,
+        epochs=EPOCHS,
+        validation_data=test_ds
+    )
+
+    # EVALUATION
+    evaluate(model, test_ds, test_labels, class_labels)
+
+    # SAVE MODEL
+    save_model(model)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Dataset cache tests (tiny synthetic class-per-folder dataset)
+
+import os
+import sys
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+import dataset_cache
+from dataset_cache import build_cache, CachedSplit
+
+
+def make_dataset(root, per_class=3):
+    rng = np.random.default_rng(0)
+    for split in ("Training", "Testing"):
+        for class_name in ("glioma", "notumor"):
+            class_dir = os.path.join(root, split, class_name)
+            os.makedirs(class_dir, exist_ok=True)
+            for i in range(per_class):
+                pixels = rng.integers(0, 255, (40, 30, 3), dtype=np.uint8)
+                Image.fromarray(pixels).save(os.path.join(class_dir, f"{i}.png"))
+
+
+def count_decodes(monkeypatch):
+    calls = []
+    original = dataset_cache.decode_image
+
+    def counting(path, image_size):
+        calls.append(path)
+        return original(path, image_size)
+
+    monkeypatch.setattr(dataset_cache, "decode_image", counting)
+    return calls
+
+
+def test_build_writes_shards_and_manifest(tmp_path):
+    data, cache = str(tmp_path / "data"), str(tmp_path / "cache")
+    make_dataset(data)
+    manifest = build_cache(data, cache, image_size=16, shard_size=4)
+
+    assert manifest['class_names'] == ['glioma', 'notumor']
+    training = CachedSplit(cache, "Training")
+    assert len(training) == 6
+    assert len(manifest['splits']['Training']['shards']) == 2
+    assert training.labels.tolist() == [0, 0, 0, 1, 1, 1]
+    assert isinstance(training.shards[0], np.memmap)
+
+    expected = dataset_cache.decode_image(os.path.join(data, "Training", "notumor", "2.png"), 16)
+    assert np.array_equal(training.row(5), expected)
+    assert np.array_equal(training.take([5, 0])[0], expected)
+
+
+def test_rebuild_only_decodes_changed_images(tmp_path, monkeypatch):
+    data, cache = str(tmp_path / "data"), str(tmp_path / "cache")
+    make_dataset(data)
+    build_cache(data, cache, image_size=16, shard_size=4)
+
+    calls = count_decodes(monkeypatch)
+    build_cache(data, cache, image_size=16, shard_size=4)
+    assert calls == []
+
+    changed = os.path.join(data, "Training", "glioma", "1.png")
+    Image.fromarray(np.full((40, 30, 3), 7, dtype=np.uint8)).save(changed)
+    build_cache(data, cache, image_size=16, shard_size=4)
+    assert calls == [changed]
+
+    training = CachedSplit(cache, "Training")
+    assert np.all(training.row(1) == 7)
+
+
+def test_shards_match_keras_load_img(tmp_path):
+    from keras.preprocessing import image
+    path = str(tmp_path / "scan.png")
+    Image.fromarray(np.random.default_rng(1).integers(0, 255, (97, 61, 3), dtype=np.uint8)).save(path)
+    served = np.asarray(image.load_img(path, target_size=(16, 16)), dtype=np.uint8)
+    assert np.array_equal(dataset_cache.decode_image(path, 16), served)
+
+
+def test_shards_built_with_another_resample_are_redecoded(tmp_path, monkeypatch):
+    data, cache = str(tmp_path / "data"), str(tmp_path / "cache")
+    make_dataset(data)
+    manifest = build_cache(data, cache, image_size=16, shard_size=4)
+    manifest['resample'] = 'bilinear'
+    with open(os.path.join(cache, dataset_cache.MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+    calls = count_decodes(monkeypatch)
+    build_cache(data, cache, image_size=16, shard_size=4)
+    assert len(calls) == 12
+
+
+def test_tf_data_fallback_decodes_like_the_shards(tmp_path):
+    from data_pipeline import build_dataset
+    data = str(tmp_path / "data")
+    make_dataset(data)
+    jpeg = os.path.join(data, "Training", "glioma", "0.jpg")
+    Image.fromarray(np.random.default_rng(2).integers(0, 255, (90, 70, 3), dtype=np.uint8)).save(jpeg, quality=80)
+
+    ds, _, _ = build_dataset(os.path.join(data, "Training"), 16, batch_size=8)
+    batch = next(iter(ds))[0].numpy()
+    expected = dataset_cache.decode_image(jpeg, 16).astype(np.float32) / 255
+    np.testing.assert_allclose(batch[0], expected, atol=1e-6)
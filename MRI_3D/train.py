@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Thread pools and the precision policy are process-wide and must be set before
+# TensorFlow runs anything, so tensorflow/model imports happen inside train().
+
+PRECISIONS = ("float32", "mixed_bfloat16")
+
+# Configurations tried by --sweep
+SWEEP = [
+    {"precision": "float32", "batch_size": 20, "accumulation_steps": 1, "xla": False},
+    {"precision": "float32", "batch_size": 64, "accumulation_steps": 1, "xla": True},
+    {"precision": "mixed_bfloat16", "batch_size": 64, "accumulation_steps": 1, "xla": True},
+    {"precision": "mixed_bfloat16", "batch_size": 64, "accumulation_steps": 4, "xla": True},
+]
+
+
+def bfloat16_supported():
+    """True when a GPU is present or the CPU has native bf16 (AVX512_BF16 / AMX)"""
+    import tensorflow as tf
+    if tf.config.list_physical_devices("GPU"):
+        return True
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_runtime(intra_op_threads, inter_op_threads, precision):
+    """Apply thread-pool sizes and the mixed-precision policy; returns the precision actually used"""
+    import tensorflow as tf
+    import keras
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    if precision == "mixed_bfloat16" and not bfloat16_supported():
+        print("bfloat16 is not supported on this machine, training in float32")
+        precision = "float32"
+    keras.mixed_precision.set_global_policy(precision)
+    return precision
+
+
+def train(precision="float32", batch_size=20, accumulation_steps=1, xla=False,
+          intra_op_threads=0, inter_op_threads=0, epochs=None, save=False,
+          feature_cache=False, augment_passes=0):
+    """Train once with the given settings and return per-epoch throughput and accuracy"""
+    precision = configure_runtime(intra_op_threads, inter_op_threads, precision)
+
+    import keras
+    import model as mri
+
+    class ThroughputLogger(keras.callbacks.Callback):
+        """Wall-clock and images/sec for the training part of each epoch"""
+
+        def __init__(self):
+            super().__init__()
+            self.epochs = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+            self.images = 0
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.images += batch_size
+
+        def on_test_begin(self, logs=None):
+            self.train_seconds = time.perf_counter() - self.start
+
+        def on_epoch_end(self, epoch, logs=None):
+            train_seconds = getattr(self, "train_seconds", time.perf_counter() - self.start)
+            self.epochs.append({
+                "epoch": epoch + 1,
+                "train_seconds": round(train_seconds, 2),
+                "epoch_seconds": round(time.perf_counter() - self.start, 2),
+                "images_per_second": round(self.images / train_seconds, 1),
+                "val_accuracy": round(float((logs or {}).get("val_accuracy", 0.0)), 4),
+            })
+            print(f"\nepoch {epoch + 1}: {self.epochs[-1]}")
+
+    train_ds, test_ds, test_labels, class_labels = mri.load_data(batch_size)
+    model = mri.build_model(len(class_labels))
+    mri.compile_model(
+        model,
+        gradient_accumulation_steps=accumulation_steps if accumulation_steps > 1 else None,
+        jit_compile=xla,
+    )
+
+    logger = ThroughputLogger()
+    if feature_cache:
+        # Two-stage: run the frozen VGG16 prefix once, then train only the head on its outputs
+        import feature_cache as fc
+        prefix, head = fc.split_model(model)
+        mri.compile_model(
+            head,
+            gradient_accumulation_steps=accumulation_steps if accumulation_steps > 1 else None,
+            jit_compile=xla,
+        )
+        train_features = fc.load_features(prefix, mri.load_split, "Training", batch_size, augment_passes,
+                                          fingerprint=mri.split_fingerprint("Training"))
+        test_features = fc.load_features(prefix, mri.load_split, "Testing", batch_size,
+                                         fingerprint=mri.split_fingerprint("Testing"))
+        head.fit(train_features.dataset(batch_size, training=True), epochs=epochs or mri.EPOCHS,
+                 validation_data=test_features.dataset(batch_size), callbacks=[logger])
+    else:
+        model.fit(train_ds, epochs=epochs or mri.EPOCHS, validation_data=test_ds, callbacks=[logger])
+
+    if save:
+        mri.evaluate(model, test_ds, test_labels, class_labels)
+        mri.save_model(model)
+
+    return {
+        "precision": precision,
+        "batch_size": batch_size,
+        "accumulation_steps": accumulation_steps,
+        "effective_batch_size": batch_size * accumulation_steps,
+        "xla": xla,
+        "intra_op_threads": intra_op_threads,
+        "inter_op_threads": inter_op_threads,
+        "feature_cache": feature_cache,
+        "augment_passes": augment_passes,
+        "epochs": logger.epochs,
+    }
+
+
+def run_sweep(args):
+    """Run every SWEEP configuration in its own process (runtime settings can't be changed in-process)"""
+    results = []
+    for config in SWEEP:
+        cmd = [sys.executable, os.path.abspath(__file__),
+               "--precision", config["precision"],
+               "--batch-size", str(config["batch_size"]),
+               "--accumulation-steps", str(config["accumulation_steps"]),
+               "--intra-op-threads", str(args.intra_op_threads),
+               "--inter-op-threads", str(args.inter_op_threads),
+               "--epochs", str(args.epochs),
+               "--report", "-"]
+        if config["xla"]:
+            cmd.append("--xla")
+        if args.feature_cache:
+            cmd += ["--feature-cache", "--augment-passes", str(args.augment_passes)]
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'precision':<15} {'batch':>5} {'accum':>5} {'xla':>5} {'s/epoch':>8} {'img/s':>8} {'val_acc':>8}")
+    for r in results:
+        last = r["epochs"][-1]
+        print(f"{r['precision']:<15} {r['batch_size']:>5} {r['accumulation_steps']:>5} {str(r['xla']):>5} "
+              f"{last['epoch_seconds']:>8} {last['images_per_second']:>8} {last['val_accuracy']:>8}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the MRI model with configurable precision, threading and batching")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--accumulation-steps", type=int, default=1,
+                        help="apply gradients every N batches (effective batch = batch size * N)")
+    parser.add_argument("--xla", action="store_true", help="compile the train step with XLA")
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="0 lets TensorFlow decide")
+    parser.add_argument("--inter-op-threads", type=int, default=0, help="0 lets TensorFlow decide")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--feature-cache", action="store_true",
+                        help="cache frozen VGG16 activations once and train only the trainable head")
+    parser.add_argument("--augment-passes", type=int, default=0,
+                        help="fixed augmented views per training image to cache with --feature-cache")
+    parser.add_argument("--save", action="store_true", help="evaluate and save the trained model as a new version")
+    parser.add_argument("--sweep", action="store_true", help="benchmark every configuration in SWEEP")
+    parser.add_argument("--report", help="write results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    if args.sweep:
+        results = run_sweep(args)
+    else:
+        results = train(args.precision, args.batch_size, args.accumulation_steps, args.xla,
+                        args.intra_op_threads, args.inter_op_threads, args.epochs, args.save,
+                        args.feature_cache, args.augment_passes)
+
+    if args.report == "-":
+        print(json.dumps(results))
+    elif args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
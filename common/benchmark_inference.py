@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import tempfile
+import contextlib
+import argparse
+import platform
+import resource
+import subprocess
+import urllib.request
+from importlib import metadata
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from common.evaluation import IMAGE_EXTENSIONS, load_image
+
+# CONFIG
+APPS = {
+    'skin': {'dir': os.path.join(ROOT_DIR, 'skin'), 'images': os.path.join(ROOT_DIR, 'test_images', 'skin_diseases'),
+             'prefix': '/skin'},
+    'mri': {'dir': os.path.join(ROOT_DIR, 'MRI_3D'), 'images': os.path.join(ROOT_DIR, 'test_images', 'MRI'),
+            'prefix': '/mri'},
+}
+CHATBOT_DIR = os.path.join(ROOT_DIR, 'Advance_Chatbot')
+GATEWAY_DIR = os.path.join(ROOT_DIR, 'gateway')
+BATCH_SIZES = (1, 8, 32)
+CONCURRENCY = (1, 4, 16)
+REPEATS = 20
+REQUESTS = 64
+READY_TIMEOUT = 300
+
+
+def summarize(seconds):
+    """Latency summary in milliseconds"""
+    if not len(seconds):
+        return {'count': 0}
+    ms = np.asarray(seconds) * 1000
+    return {'count': len(ms), 'mean': round(float(ms.mean()), 3),
+            'p50': round(float(np.percentile(ms, 50)), 3), 'p95': round(float(np.percentile(ms, 95)), 3),
+            'p99': round(float(np.percentile(ms, 99)), 3), 'max': round(float(ms.max()), 3)}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def process_peak_rss_mb(pid):
+    """Peak RSS of another process from /proc (Linux only, None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def list_images(directory):
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def environment():
+    """Versions that results are only comparable across"""
+    info = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'cpus': os.cpu_count()}
+    for package in ('tensorflow', 'keras', 'flask', 'pillow'):
+        try:
+            info[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            info[package] = None
+    return info
+
+
+def measure_app(name, spawned_at, batch_sizes, repeats):
+    """Runs inside a fresh process: cold start, per-stage timings, batched latency, peak RSS"""
+    config = APPS[name]
+    os.environ['PROFILING'] = 'on'
+    os.environ.setdefault('MODEL_POLL_SECONDS', '3600')
+    sys.path.insert(0, config['dir'])
+
+    start = time.perf_counter()
+    import tensorflow  # noqa: F401  (timed on its own so model load is not blamed for it)
+    import_tf = time.perf_counter() - start
+    start = time.perf_counter()
+    import app
+    import_app = time.perf_counter() - start
+
+    # The apps time decode/normalize/predict with profiler stages; keep every sample
+    samples = defaultdict(list)
+    app.profiler.record = lambda stage, seconds: samples[stage].append(seconds)
+
+    paths = list_images(config['images'])
+    start = time.perf_counter()
+    first = app.predict_image(paths[0], use_tta=False)
+    first_prediction = time.perf_counter() - start
+    result = {
+        'app': name,
+        'model_version': first['model_version'],
+        'images': len(paths),
+        'cold_start_seconds': {
+            'import_tensorflow': round(import_tf, 3),
+            'import_app': round(import_app, 3),
+            'first_prediction': round(first_prediction, 3),
+            'process_to_ready': round(time.time() - spawned_at, 3),
+        },
+        'peak_rss_mb': {'after_load': peak_rss_mb()},
+    }
+
+    version, model = app.registry.get(app.MODEL_NAME)
+    path = dict(app.registry.discover(app.MODEL_NAME)).get(version)
+    if path:
+        start = time.perf_counter()
+        app.registry.loader(path)
+        result['model_load_seconds'] = round(time.perf_counter() - start, 3)
+
+    samples.clear()
+    for _ in range(repeats):
+        for path in paths:
+            app.predict_image(path, use_tta=False)
+    result['stages_ms'] = {stage: summarize(values) for stage, values in samples.items()}
+    result['peak_rss_mb']['after_single'] = peak_rss_mb()
+
+    one = load_image(paths[0], model.input_shape[1])[None]
+    result['batched'] = {}
+    for batch_size in batch_sizes:
+        batch = np.repeat(one, batch_size, axis=0)
+        model.predict_on_batch(batch)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_on_batch(batch)
+            times.append(time.perf_counter() - start)
+        stats = summarize(times)
+        stats['images_per_second'] = round(batch_size * 1000 / stats['mean'], 1)
+        result['batched'][str(batch_size)] = stats
+    result['peak_rss_mb']['after_batched'] = peak_rss_mb()
+    return result
+
+
+def run_worker(name, batch_sizes, repeats):
+    """Spawn measure_app in a clean interpreter so the cold start is real"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', name, '--spawned-at', repr(time.time()),
+               '--repeats', str(repeats), '--batch-sizes', *map(str, batch_sizes)]
+    done = subprocess.run(command, capture_output=True, text=True)
+    lines = done.stdout.strip().splitlines()
+    if done.returncode != 0 or not lines:
+        return {'app': name, 'error': (done.stderr.strip().splitlines() or ['worker failed'])[-1]}
+    return json.loads(lines[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(directory, port, upload_root):
+    """Serve <directory>/app.py's Flask object with werkzeug's threaded server in a child process.
+
+    Uploads go to upload_root rather than the app's tracked static/uploads folder.
+    """
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); from app import app; "
+            "from werkzeug.serving import make_server; "
+            "make_server('127.0.0.1', int(sys.argv[2]), app, threaded=True).serve_forever()")
+    env = dict(os.environ, MODEL_POLL_SECONDS=os.getenv('MODEL_POLL_SECONDS', '3600'), UPLOAD_ROOT=upload_root)
+    return subprocess.Popen([sys.executable, '-c', code, directory, str(port)],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def wait_until_ready(url, process, timeout=READY_TIMEOUT):
+    """Seconds until url answers, or None if the server died or timed out"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.2)
+    return None
+
+
+@contextlib.contextmanager
+def serve(directory, ready_path='/'):
+    """Run an app server for the duration of a with block; yields (base_url, process, ready_seconds)"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    uploads = tempfile.TemporaryDirectory(prefix='benchmark-uploads-')
+    process = start_server(directory, port, uploads.name)
+    try:
+        ready = wait_until_ready(base_url + ready_path, process)
+        if ready is None:
+            process.kill()
+            stderr = process.stderr.read().decode(errors='replace').strip().splitlines()
+            raise RuntimeError((stderr or ['server did not start'])[-1])
+        yield base_url, process, ready
+    finally:
+        process.terminate()
+        process.wait()
+        uploads.cleanup()
+
+
+def encode_multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def http_load(url, paths, concurrency, requests):
+    """POST images to url from concurrent clients; returns latency, throughput and error counts"""
+    payloads = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            payloads.append(encode_multipart('file', os.path.basename(path), f.read()))
+
+    def post(i):
+        body, content_type = payloads[i % len(payloads)]
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                ok = response.status == 200 and b'An error occurred' not in response.read()
+        except OSError:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(post, range(requests)))
+    wall = time.perf_counter() - start
+    stats = summarize([seconds for seconds, ok in results if ok])
+    stats.update({'concurrency': concurrency, 'errors': sum(not ok for _, ok in results),
+                  'requests_per_second': round(len(results) / wall, 1)})
+    return stats
+
+
+def load_levels(url, paths, concurrency_levels, requests):
+    http_load(url, paths, 1, len(paths))    # warm-up
+    return [http_load(url, paths, level, requests) for level in concurrency_levels]
+
+
+def benchmark_http(name, concurrency_levels, requests):
+    """Start the app, wait for it, then load-test POST / at each concurrency level"""
+    try:
+        with serve(APPS[name]['dir']) as (base_url, process, ready):
+            return {
+                'ready_seconds': round(ready, 3),
+                'load': load_levels(base_url + '/', list_images(APPS[name]['images']), concurrency_levels, requests),
+                'server_peak_rss_mb': process_peak_rss_mb(process.pid),
+            }
+    except RuntimeError as e:
+        return {'error': str(e)}
+
+
+def benchmark_gateway(names, concurrency_levels, requests):
+    """Total peak RSS and POST latency: chatbot, skin and MRI as separate processes vs one gateway"""
+    separate = {'processes': {}, 'load': {}}
+    with contextlib.ExitStack() as stack:
+        servers = {}
+        for service, directory in [('chatbot', CHATBOT_DIR)] + [(name, APPS[name]['dir']) for name in names]:
+            try:
+                servers[service] = stack.enter_context(serve(directory))
+            except RuntimeError as e:
+                separate['processes'][service] = {'error': str(e)}
+        for name in names:
+            if name in servers:
+                base_url = servers[name][0]
+                separate['load'][name] = load_levels(base_url + '/', list_images(APPS[name]['images']),
+                                                     concurrency_levels, requests)
+        for service, (_, process, ready) in servers.items():
+            separate['processes'][service] = {'ready_seconds': round(ready, 3),
+                                              'peak_rss_mb': process_peak_rss_mb(process.pid)}
+    separate['total_peak_rss_mb'] = round(sum(p.get('peak_rss_mb') or 0 for p in separate['processes'].values()), 1)
+
+    try:
+        with serve(GATEWAY_DIR, '/api/gateway/status') as (base_url, process, ready):
+            gateway = {'ready_seconds': round(ready, 3), 'load': {}}
+            for name in names:
+                gateway['load'][name] = load_levels(f"{base_url}{APPS[name]['prefix']}/",
+                                                    list_images(APPS[name]['images']), concurrency_levels, requests)
+            gateway['total_peak_rss_mb'] = process_peak_rss_mb(process.pid)
+    except RuntimeError as e:
+        return {'separate': separate, 'gateway': {'error': str(e)}}
+
+    p95_delta = {}
+    for name in names:
+        if name in separate['load']:
+            p95_delta[name] = {str(a['concurrency']): round(b.get('p95', 0) - a.get('p95', 0), 3)
+                               for a, b in zip(separate['load'][name], gateway['load'][name])}
+    return {
+        'separate': separate,
+        'gateway': gateway,
+        'rss_saved_mb': round(separate['total_peak_rss_mb'] - (gateway['total_peak_rss_mb'] or 0), 1),
+        'p95_delta_ms': p95_delta,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the skin and MRI models on test_images")
+    parser.add_argument('--apps', nargs='+', choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=list(BATCH_SIZES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=list(CONCURRENCY))
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="timed passes per measurement")
+    parser.add_argument('--requests', type=int, default=REQUESTS, help="HTTP requests per concurrency level")
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--gateway', action='store_true',
+                        help="also compare separate processes with the single gateway process")
+    parser.add_argument('--output', help="write results as JSON (default: stdout)")
+    parser.add_argument('--worker', choices=sorted(APPS), help=argparse.SUPPRESS)
+    parser.add_argument('--spawned-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_app(args.worker, args.spawned_at, args.batch_sizes, args.repeats)))
+        return
+
+    results = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(), 'apps': {}}
+    for name in args.apps:
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        result = run_worker(name, args.batch_sizes, args.repeats)
+        if not args.skip_http and 'error' not in result:
+            result['http'] = benchmark_http(name, args.concurrency, args.requests)
+        results['apps'][name] = result
+    if args.gateway:
+        print("Benchmarking gateway vs separate processes...", file=sys.stderr)
+        results['gateway'] = benchmark_gateway(args.apps, args.concurrency, args.requests)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_labelled_images(directory, class_names=None):
+    """Return (paths, labels, class_names) for <directory>/<class>/<image>.
+
+    class_names fixes the label order to match a model's output (e.g. the skin
+    app's list); otherwise folders are sorted like flow_from_directory.
+    """
+    folders = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    class_names = list(class_names or folders)
+    lookup = {name.lower(): i for i, name in enumerate(class_names)}
+
+    paths, labels = [], []
+    for folder in folders:
+        if folder.lower() not in lookup:
+            print(f"Skipping folder without a matching class: {folder}")
+            continue
+        for filename in sorted(os.listdir(os.path.join(directory, folder))):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(directory, folder, filename))
+                labels.append(lookup[folder.lower()])
+    return paths, np.asarray(labels, dtype=np.int64), class_names
+
+
+def load_image(path, image_size):
+    """Decode like the apps do (keras load_img: RGB, nearest resize), scaled to [0, 1]"""
+    from PIL import Image
+    with Image.open(path) as img:
+        img = img.convert('RGB').resize((image_size, image_size), Image.NEAREST)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def run_inference(model, paths, image_size, batch_size=32, workers=None, labels=None):
+    """Batched inference over every image once; returns (scores, timing).
+
+    One untimed warm-up batch runs first so graph tracing isn't billed to any
+    class. With labels, batches never mix classes, so per_class_ms is timed on
+    each class's own batches rather than apportioned.
+    """
+    labels = np.zeros(len(paths), dtype=np.int64) if labels is None else np.asarray(labels)
+    batches = []
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        batches += [(label, idx[i:i + batch_size]) for i in range(0, len(idx), batch_size)]
+
+    scores = None
+    num_labels = int(labels.max()) + 1 if len(labels) else 0
+    class_seconds = np.zeros(num_labels)
+    decode_seconds = 0.0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        load = lambda idx: np.stack(list(pool.map(lambda i: load_image(paths[i], image_size), idx)))
+        if batches:
+            model.predict_on_batch(load(batches[0][1]))    # warm-up
+        for label, idx in batches:
+            t0 = time.perf_counter()
+            batch = load(idx)
+            t1 = time.perf_counter()
+            out = np.asarray(model.predict_on_batch(batch))
+            class_seconds[label] += time.perf_counter() - t1
+            decode_seconds += t1 - t0
+            if scores is None:
+                scores = np.empty((len(paths),) + out.shape[1:], dtype=out.dtype)
+            scores[idx] = out
+
+    counts = np.bincount(labels, minlength=num_labels)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        per_class_ms = np.nan_to_num(1000 * class_seconds / counts)
+    inference_seconds = class_seconds.sum()
+    timing = {
+        'images': len(paths),
+        'batch_size': batch_size,
+        'decode_seconds': round(decode_seconds, 3),
+        'inference_seconds': round(float(inference_seconds), 3),
+        'images_per_second': round(len(paths) / inference_seconds, 1) if len(paths) else 0.0,
+        'per_class_ms': per_class_ms.round(3).tolist(),
+    }
+    return scores if scores is not None else np.zeros((0, 0)), timing
+
+
+def save_run(path, scores, labels, paths, class_names, timing):
+    """Cache one inference run so metrics and comparisons never need the model again"""
+    np.savez_compressed(
+        path, scores=scores, labels=labels, paths=np.asarray(paths),
+        class_names=np.asarray(class_names), timing=json.dumps(timing)
+    )
+
+
+def load_run(path):
+    data = np.load(path)
+    return {
+        'scores': data['scores'],
+        'labels': data['labels'],
+        'paths': data['paths'].tolist(),
+        'class_names': data['class_names'].tolist(),
+        'timing': json.loads(str(data['timing'])),
+    }
+
+
+def confusion_matrix(labels, preds, num_classes):
+    return np.bincount(labels * num_classes + preds, minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+
+
+def reliability_bins(confidence, correct, n_bins):
+    """Per-bin (count, accuracy, mean confidence) plus ECE"""
+    bins = np.minimum((confidence * n_bins).astype(np.int64), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    accuracy = np.bincount(bins, weights=correct, minlength=n_bins)
+    mean_conf = np.bincount(bins, weights=confidence, minlength=n_bins)
+    ece = np.abs(accuracy - mean_conf).sum() / max(len(confidence), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        accuracy, mean_conf = accuracy / counts, mean_conf / counts
+    return counts, accuracy, mean_conf, ece
+
+
+def bootstrap(labels, preds, confidence, num_classes, n_bins, n_boot, seed):
+    """95% intervals for accuracy, macro-F1 and ECE from n_boot resamples, all computed at once"""
+    rng = np.random.default_rng(seed)
+    n = len(labels)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    b_labels, b_preds, b_conf = labels[idx], preds[idx], confidence[idx]
+    correct = (b_labels == b_preds)
+    offsets = np.arange(n_boot)[:, None]
+
+    accuracy = correct.mean(axis=1)
+
+    cm = np.bincount((offsets * num_classes * num_classes + b_labels * num_classes + b_preds).ravel(),
+                     minlength=n_boot * num_classes * num_classes).reshape(n_boot, num_classes, num_classes)
+    tp = np.diagonal(cm, axis1=1, axis2=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f1 = np.nan_to_num(2 * tp / (cm.sum(axis=1) + cm.sum(axis=2)))
+    macro_f1 = f1.mean(axis=1)
+
+    bins = np.minimum((b_conf * n_bins).astype(np.int64), n_bins - 1) + offsets * n_bins
+    acc_sum = np.bincount(bins.ravel(), weights=correct.ravel(), minlength=n_boot * n_bins).reshape(n_boot, n_bins)
+    conf_sum = np.bincount(bins.ravel(), weights=b_conf.ravel(), minlength=n_boot * n_bins).reshape(n_boot, n_bins)
+    ece = np.abs(acc_sum - conf_sum).sum(axis=1) / n
+
+    def interval(values):
+        low, high = np.percentile(values, [2.5, 97.5])
+        return [round(float(low), 4), round(float(high), 4)]
+
+    return {'accuracy': interval(accuracy), 'macro_f1': interval(macro_f1), 'ece': interval(ece)}
+
+
+def compute_metrics(scores, labels, class_names, n_bins=15, top_k=(1, 2, 3), n_boot=1000, seed=0):
+    """Confusion matrix, per-class P/R/F1, top-k, calibration and bootstrap CIs, vectorized"""
+    num_classes = len(class_names)
+    labels = np.asarray(labels, dtype=np.int64)
+    preds = scores.argmax(axis=1)
+    confidence = scores.max(axis=1).astype(np.float64)
+    correct = (preds == labels).astype(np.float64)
+
+    cm = confusion_matrix(labels, preds, num_classes)
+    tp = np.diag(cm).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = np.nan_to_num(tp / cm.sum(axis=0))
+        recall = np.nan_to_num(tp / cm.sum(axis=1))
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    ranked = np.argsort(-scores, axis=1)
+    hits = np.cumsum(ranked == labels[:, None], axis=1)
+    top_k_accuracy = {f"top_{k}": round(float(hits[:, k - 1].mean()), 4) for k in top_k if k <= num_classes}
+
+    counts, bin_accuracy, bin_confidence, ece = reliability_bins(confidence, correct, n_bins)
+
+    return {
+        'images': int(len(labels)),
+        'accuracy': round(float(correct.mean()), 4),
+        'macro_f1': round(float(f1.mean()), 4),
+        'ece': round(float(ece), 4),
+        **top_k_accuracy,
+        'per_class': {
+            name: {'precision': round(float(p), 4), 'recall': round(float(r), 4), 'f1': round(float(f), 4),
+                   'support': int(s)}
+            for name, p, r, f, s in zip(class_names, precision, recall, f1, cm.sum(axis=1))
+        },
+        'confusion_matrix': cm.tolist(),
+        'reliability': {
+            'counts': counts.tolist(),
+            'accuracy': np.nan_to_num(bin_accuracy).round(4).tolist(),
+            'confidence': np.nan_to_num(bin_confidence).round(4).tolist(),
+        },
+        'bootstrap_95': bootstrap(labels, preds, confidence, num_classes, n_bins, n_boot, seed) if len(labels) else {},
+    }
+
+
+def report(run, **options):
+    """Metrics plus throughput for a cached run"""
+    metrics = compute_metrics(run['scores'], run['labels'], run['class_names'], **options)
+    timing = dict(run['timing'])
+    timing['per_class_ms'] = dict(zip(run['class_names'], timing.get('per_class_ms', [])))
+    metrics['throughput'] = timing
+    return metrics
+
+
+def print_report(metrics, class_names):
+    print(f"Images: {metrics['images']}  accuracy: {metrics['accuracy']}  macro-F1: {metrics['macro_f1']}  "
+          f"ECE: {metrics['ece']}")
+    print("Top-k:", {k: v for k, v in metrics.items() if k.startswith('top_')})
+    print("95% bootstrap CIs:", metrics['bootstrap_95'])
+
+    width = max(len(name) for name in class_names) + 2
+    print("\nConfusion matrix (rows = true, columns = predicted):")
+    print(' ' * width + ''.join(f"{name[:8]:>9}" for name in class_names))
+    for name, row in zip(class_names, metrics['confusion_matrix']):
+        print(f"{name:<{width}}" + ''.join(f"{v:>9}" for v in row))
+
+    print("\nReliability (bin: count, accuracy, confidence):")
+    rel = metrics['reliability']
+    for i, (c, a, conf) in enumerate(zip(rel['counts'], rel['accuracy'], rel['confidence'])):
+        if c:
+            print(f"  {i:>2}: {c:>6} {a:>7} {conf:>7}")
+
+    if 'throughput' in metrics:
+        print("\nThroughput:", metrics['throughput'])
+
+
+def compare(run_a, run_b, **options):
+    """Side-by-side metrics of two cached runs (no inference needed)"""
+    a, b = report(run_a, **options), report(run_b, **options)
+    keys = ['accuracy', 'macro_f1', 'ece'] + [k for k in a if k.startswith('top_')]
+    rows = {k: {'a': a[k], 'b': b[k], 'delta': round(b[k] - a[k], 4)} for k in keys}
+    rows['images_per_second'] = {
+        'a': a['throughput']['images_per_second'], 'b': b['throughput']['images_per_second'],
+        'delta': round(b['throughput']['images_per_second'] - a['throughput']['images_per_second'], 1),
+    }
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached, vectorized evaluation for the skin and MRI models")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_cmd = sub.add_parser('run', help="run inference once over a test directory and cache the scores")
+    run_cmd.add_argument('--model', required=True, help="path to a .keras/.h5 model")
+    run_cmd.add_argument('--data', required=True, help="test directory with one folder per class")
+    run_cmd.add_argument('--out', required=True, help="where to cache the run (.npz)")
+    run_cmd.add_argument('--classes', help="comma-separated class order of the model output")
+    run_cmd.add_argument('--image-size', type=int, default=128)
+    run_cmd.add_argument('--batch-size', type=int, default=32)
+
+    report_cmd = sub.add_parser('report', help="metrics for a cached run")
+    report_cmd.add_argument('run')
+    report_cmd.add_argument('--json', help="also write metrics as JSON")
+
+    compare_cmd = sub.add_parser('compare', help="compare two cached runs")
+    compare_cmd.add_argument('run_a')
+    compare_cmd.add_argument('run_b')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from common.model_registry import default_loader
+        classes = args.classes.split(',') if args.classes else None
+        paths, labels, class_names = list_labelled_images(args.data, classes)
+        scores, timing = run_inference(default_loader(args.model), paths, args.image_size, args.batch_size,
+                                      labels=labels)
+        save_run(args.out, scores, labels, paths, class_names, timing)
+        metrics = report(load_run(args.out))
+        print_report(metrics, class_names)
+    elif args.command == 'report':
+        run = load_run(args.run)
+        metrics = report(run)
+        print_report(metrics, run['class_names'])
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(metrics, f, indent=2)
+    else:
+        for key, row in compare(load_run(args.run_a), load_run(args.run_b)).items():
+            print(f"{key:<18} {row['a']:>10} {row['b']:>10} {row['delta']:>+10}")
+
+
+if __name__ == "__main__":
+    main()
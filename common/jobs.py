@@ -0,0 +1,282 @@
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from collections import deque
+
+import numpy as np
+
+PRIORITIES = {'interactive': 0, 'bulk': 10}
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue already holds max_pending jobs"""
+
+
+class JobQueue:
+    """SQLite-backed job queue with a bounded worker pool.
+
+    db_path=':memory:' keeps everything in-process; a file path survives restarts
+    (jobs that were running are re-queued on start). Submissions with the same
+    task and content hash share one job while it is queued or running; finished
+    results are never reused, as the served model may have been swapped since.
+    Lower priority numbers run first, so interactive uploads overtake bulk ones.
+    """
+
+    def __init__(self, handler, db_path=':memory:', workers=2, max_pending=1000,
+                 retention_seconds=3600, history=1000):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stop = False
+        self._wait_times = deque(maxlen=history)
+        self._run_times = deque(maxlen=history)
+        self.counters = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0}
+
+        with self._lock:
+            self._db.executescript('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    dedup_key TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    payload BLOB,
+                    options TEXT,
+                    result TEXT,
+                    error TEXT,
+                    submitted_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, submitted_at);
+                CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key);
+                UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running';
+            ''')
+            self._db.commit()
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, task, payload, priority='interactive', options=None):
+        """Queue payload (bytes) for task; returns (job_id, deduplicated)"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {sorted(PRIORITIES)}")
+        priority = PRIORITIES[priority]
+        options_json = json.dumps(options or {}, sort_keys=True)
+        dedup_key = hashlib.sha256(task.encode('utf-8') + options_json.encode('utf-8') + payload).hexdigest()
+
+        with self._lock:
+            self.counters['submitted'] += 1
+            row = self._db.execute(
+                "SELECT id, status, priority FROM jobs WHERE dedup_key = ? AND status IN ('queued', 'running') "
+                "ORDER BY submitted_at DESC LIMIT 1", (dedup_key,)
+            ).fetchone()
+            if row:
+                job_id, status, queued_priority = row
+                # An interactive duplicate promotes a still-queued bulk job
+                if status == 'queued' and priority < queued_priority:
+                    self._db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, job_id))
+                    self._db.commit()
+                self.counters['deduplicated'] += 1
+                return job_id, True
+
+            pending = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFull(f"Queue is full ({pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex
+            self._db.execute(
+                "INSERT INTO jobs (id, dedup_key, task, priority, status, payload, options, submitted_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, dedup_key, task, priority, payload, options_json, time.time())
+            )
+            self._db.commit()
+            self._changed.notify_all()
+        return job_id, False
+
+    def get(self, job_id):
+        """Status dict for a job, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, task, priority, status, result, error, submitted_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            position = None
+            if row[3] == 'queued':
+                position = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority < ? OR (priority = ? AND submitted_at < ?))", (row[2], row[2], row[6])
+                ).fetchone()[0]
+
+        job = {
+            'job_id': row[0], 'task': row[1], 'priority': row[2], 'status': row[3],
+            'result': json.loads(row[4]) if row[4] else None, 'error': row[5],
+            'submitted_at': row[6], 'started_at': row[7], 'finished_at': row[8],
+        }
+        if position is not None:
+            job['queue_position'] = position
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or timeout); returns its status dict"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            while True:
+                row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None or row[0] in ('done', 'failed'):
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self.get(job_id)
+
+    def _claim(self):
+        """Take the next job off the queue (caller holds the lock)"""
+        row = self._db.execute(
+            "SELECT id, task, payload, options, submitted_at FROM jobs WHERE status = 'queued' "
+            "ORDER BY priority, submitted_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        self._db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (now, row[0]))
+        self._db.commit()
+        self._wait_times.append(now - row[4])
+        return row
+
+    def _work(self):
+        while True:
+            with self._lock:
+                job = self._claim()
+                while job is None and not self._stop:
+                    self._changed.wait(timeout=60)
+                    self._expire()
+                    job = self._claim()
+                if job is None:
+                    return
+
+            job_id, task, payload, options, _ = job
+            start = time.perf_counter()
+            try:
+                result = self.handler(task, payload, **json.loads(options or '{}'))
+                update = ("UPDATE jobs SET status = 'done', result = ?, payload = NULL, finished_at = ? WHERE id = ?",
+                          (json.dumps(result), time.time(), job_id))
+                counter = 'completed'
+            except Exception as e:
+                update = ("UPDATE jobs SET status = 'failed', error = ?, payload = NULL, finished_at = ? WHERE id = ?",
+                          (str(e), time.time(), job_id))
+                counter = 'failed'
+
+            with self._lock:
+                self._db.execute(*update)
+                self._db.commit()
+                self.counters[counter] += 1
+                self._run_times.append(time.perf_counter() - start)
+                self._changed.notify_all()
+
+    def _expire(self):
+        """Forget finished jobs past the retention window (caller holds the lock)"""
+        cutoff = time.time() - self.retention_seconds
+        self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+        self._db.commit()
+
+    def metrics(self):
+        """Queue depth per priority and wait/run time summaries in milliseconds"""
+        def summary(values):
+            if not values:
+                return {'count': 0}
+            ms = np.asarray(values) * 1000
+            return {'count': len(ms), 'mean': round(float(ms.mean()), 2),
+                    'p50': round(float(np.percentile(ms, 50)), 2), 'p95': round(float(np.percentile(ms, 95)), 2)}
+
+        with self._lock:
+            depth = dict(self._db.execute(
+                "SELECT priority, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY priority"
+            ).fetchall())
+            running = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            wait_times, run_times = list(self._wait_times), list(self._run_times)
+            counters = dict(self.counters)
+
+        names = {v: k for k, v in PRIORITIES.items()}
+        return {
+            'queue_depth': {names.get(p, str(p)): n for p, n in depth.items()},
+            'queued': sum(depth.values()),
+            'running': running,
+            'workers': len(self._workers),
+            'wait_ms': summary(wait_times),
+            'run_ms': summary(run_times),
+            **counters,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            self._stop = True
+            self._changed.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+
+def create_job_blueprint(queue, task, url_prefix='/api/jobs'):
+    """Flask routes for submitting images to queue and polling/streaming their results"""
+    from flask import Blueprint, Response, jsonify, request
+
+    jobs = Blueprint(f"jobs_{task}", __name__, url_prefix=url_prefix)
+
+    @jobs.route('', methods=['POST'])
+    def submit_job():
+        """Submit an image; returns a job id immediately"""
+        file = request.files.get('file')
+        if file is None or file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        options = {'tta': request.form.get('tta') == '1'} if 'tta' in request.form else {}
+        try:
+            job_id, deduplicated = queue.submit(
+                task, file.read(), priority=request.form.get('priority', 'interactive'), options=options
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except QueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        return jsonify({'job_id': job_id, 'deduplicated': deduplicated, 'status_url': f"{request.base_url}/{job_id}"}), 202
+
+    @jobs.route('/<job_id>', methods=['GET'])
+    def job_status(job_id):
+        """Poll a job"""
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        return jsonify(job)
+
+    @jobs.route('/<job_id>/stream', methods=['GET'])
+    def job_stream(job_id):
+        """Server-sent events: the queued status first, then the final result"""
+        def generate():
+            job = queue.get(job_id)
+            if job is None:
+                yield f"data: {json.dumps({'error': 'Unknown job'})}\n\n"
+                return
+            yield f"data: {json.dumps(job)}\n\n"
+            while job and job['status'] not in ('done', 'failed'):
+                job = queue.wait(job_id, timeout=15)
+                if job:
+                    yield f"data: {json.dumps(job)}\n\n"
+
+        return Response(generate(), mimetype='text/event-stream')
+
+    @jobs.route('/metrics', methods=['GET'])
+    def job_metrics():
+        return jsonify(queue.metrics())
+
+    return jobs
@@ -0,0 +1,202 @@
+import os
+import re
+import random
+import zlib
+import threading
+
+# Versioned artifacts live at <root>/<name>/v<N>.keras (or .h5)
+VERSION_PATTERN = re.compile(r'^v(\d+)\.(keras|h5)$')
+
+
+def default_loader(path):
+    """Load a Keras model from disk (imported lazily so the registry stays light)"""
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+
+def parse_routing(spec):
+    """Parse an A/B routing spec like 'v3=0.9,v4=0.1' into {'v3': 0.9, 'v4': 0.1}"""
+    routing = {}
+    if not spec:
+        return routing
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        version, _, weight = part.partition('=')
+        routing[version.strip()] = float(weight) if weight else 1.0
+    return routing
+
+
+class ModelRegistry:
+    """Discovers versioned model artifacts and keeps each loaded version in memory once.
+
+    Loaded models are shared by every caller in the process. A new version is
+    fully loaded before it is swapped in, and callers keep the model object
+    they were handed, so in-flight requests finish on the version they started with.
+    """
+
+    def __init__(self, root, loader=None, legacy_paths=None, routing=None):
+        self.root = root
+        self.loader = loader or default_loader
+        self.legacy_paths = dict(legacy_paths or {})
+        self.routing = {name: dict(weights) for name, weights in (routing or {}).items()}
+        self._models = {}    # name -> {version: model}
+        self._latest = {}    # name -> version currently served by default
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def discover(self, name):
+        """Return [(version, path)] for every artifact of a model, oldest first"""
+        found = []
+        model_dir = os.path.join(self.root, name)
+        if os.path.isdir(model_dir):
+            for filename in os.listdir(model_dir):
+                match = VERSION_PATTERN.match(filename)
+                if match:
+                    found.append((int(match.group(1)), f"v{match.group(1)}", os.path.join(model_dir, filename)))
+        found.sort()
+        versions = [(version, path) for _, version, path in found]
+
+        if not versions and name in self.legacy_paths and os.path.exists(self.legacy_paths[name]):
+            versions.append(('legacy', self.legacy_paths[name]))
+        return versions
+
+    def next_version_path(self, name, ext='.keras'):
+        """Path a freshly trained model should be saved to"""
+        numbers = [int(version[1:]) for version, _ in self.discover(name) if version != 'legacy']
+        next_number = max(numbers, default=0) + 1
+        model_dir = os.path.join(self.root, name)
+        os.makedirs(model_dir, exist_ok=True)
+        return os.path.join(model_dir, f"v{next_number}{ext}")
+
+    def _load_version(self, name, version, path):
+        """Load one version unless it is already resident; never holds the main lock while loading"""
+        with self._lock:
+            if version in self._models.get(name, {}):
+                return self._models[name][version]
+            load_lock = self._load_locks.setdefault((name, version), threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if version in self._models.get(name, {}):
+                    return self._models[name][version]
+            model = self.loader(path)
+            with self._lock:
+                self._models.setdefault(name, {})[version] = model
+            return model
+
+    def load(self, name, version=None):
+        """Make sure a version (latest by default) is loaded and return it"""
+        versions = dict(self.discover(name))
+        if not versions:
+            raise LookupError(f"No model artifacts found for '{name}' under {self.root}")
+        is_default = version is None
+        if is_default:
+            version = list(versions)[-1]
+        if version not in versions:
+            raise LookupError(f"Model '{name}' has no version '{version}'")
+
+        model = self._load_version(name, version, versions[version])
+        if is_default:
+            with self._lock:
+                self._latest.setdefault(name, version)
+        return model
+
+    def refresh(self, name):
+        """Load the newest artifact if it changed and swap it in; returns the served version"""
+        versions = self.discover(name)
+        if not versions:
+            return self._latest.get(name)
+
+        newest, path = versions[-1]
+        if self._latest.get(name) != newest:
+            self._load_version(name, newest, path)
+            with self._lock:
+                previous = self._latest.get(name)
+                self._latest[name] = newest
+                # Drop the old default unless A/B routing still sends traffic to it
+                if previous and previous not in self.routing.get(name, {}):
+                    self._models[name].pop(previous, None)
+            print(f"Model '{name}' now serving {newest} (was {previous})")
+        return newest
+
+    def set_routing(self, name, weights):
+        """Split traffic between versions, e.g. {'v3': 0.9, 'v4': 0.1}; empty to disable"""
+        for version in weights:
+            self.load(name, version)
+        with self._lock:
+            self.routing[name] = dict(weights)
+
+    def _route(self, name, key):
+        """Pick a version for one request according to the routing weights"""
+        weights = self.routing.get(name)
+        if not weights:
+            return None
+        total = sum(weights.values())
+        if total <= 0:
+            return None
+        # A key (e.g. client id) keeps a caller pinned to the same version
+        if key is not None:
+            point = (zlib.crc32(str(key).encode('utf-8')) % 10000) / 10000 * total
+        else:
+            point = random.random() * total
+        for version, weight in weights.items():
+            point -= weight
+            if point < 0:
+                return version
+        return list(weights)[-1]
+
+    def get(self, name, key=None):
+        """Return (version, model) for a request"""
+        version = self._route(name, key)
+        if version is not None:
+            try:
+                return version, self.load(name, version)
+            except LookupError as e:
+                # Routed to a version that is not on disk: stop routing to it and serve the default
+                print(f"Dropping '{version}' from routing for '{name}': {e}")
+                with self._lock:
+                    weights = dict(self.routing.get(name, {}))
+                    weights.pop(version, None)
+                    self.routing[name] = weights
+
+        with self._lock:
+            version = self._latest.get(name)
+            model = self._models.get(name, {}).get(version)
+        if model is not None:
+            return version, model
+
+        model = self.load(name)
+        with self._lock:
+            version = self._latest[name]
+        return version, model
+
+    def versions(self, name):
+        """Versions currently resident in memory"""
+        with self._lock:
+            return sorted(self._models.get(name, {}))
+
+    def start_watcher(self, interval=30):
+        """Poll the model directory in the background and hot-swap new versions"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                for name in set(self._latest) | set(self.legacy_paths):
+                    try:
+                        self.refresh(name)
+                    except Exception as e:
+                        print(f"Error refreshing model '{name}': {e}")
+
+        self._watcher = threading.Thread(target=watch, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
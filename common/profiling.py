@@ -0,0 +1,252 @@
+import os
+import sys
+import hmac
+import math
+import time
+import uuid
+import random
+import bisect
+import threading
+import contextlib
+from collections import Counter
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_CAPTURE_SECONDS = 60
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold(frame):
+    """Root-first 'a;b;c' stack string for one frame, as flamegraph.pl/speedscope expect"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def write_folded(stacks, path):
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class Sampler:
+    """One background thread that samples the stacks of the threads it is asked to watch"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._watched = {}    # thread id, or ('all', capture id) for every thread -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name='profile-sampler', daemon=True).start()
+
+    def watch(self, thread_id):
+        stacks = Counter()
+        with self._lock:
+            self._watched[thread_id] = stacks
+        self._wake.set()
+        return stacks
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            return self._watched.pop(thread_id, None)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._watched
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._watched.items():
+                    if isinstance(thread_id, tuple):
+                        for tid, frame in frames.items():
+                            if tid != me:
+                                stacks[fold(frame)] += 1
+                    elif thread_id in frames:
+                        stacks[fold(frames[thread_id])] += 1
+            time.sleep(self.interval)
+
+
+class Profiler:
+    """Per-stage timers plus sampled stack profiles for a Flask app.
+
+    Disabled profilers hand out a shared no-op context from stage(), so leaving
+    the calls in the request path costs next to nothing.
+    """
+
+    def __init__(self, enabled=False, sample_rate=0.0, profile_dir='profiles', interval=0.005, token=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.token = token      # lets non-local clients reach /metrics and /debug/profile
+        self._stats = {}    # stage -> [count, total seconds, bucket counts]
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._noop = contextlib.nullcontext()
+
+    @property
+    def sampler(self):
+        # Double-checked so concurrent first samples share one Sampler (and one thread)
+        if self._sampler is None:
+            with self._lock:
+                if self._sampler is None:
+                    self._sampler = Sampler(self.interval)
+        return self._sampler
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                stats = self._stats[stage] = [0, 0.0, [0] * (len(BUCKETS) + 1)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    @contextlib.contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def stage(self, stage):
+        """with profiler.stage('decode'): ..."""
+        return self._timed(stage) if self.enabled else self._noop
+
+    def prometheus(self):
+        """Stage timings in Prometheus text exposition format"""
+        lines = ['# TYPE inference_stage_seconds histogram']
+        with self._lock:
+            stats = {stage: (count, total, list(buckets)) for stage, (count, total, buckets) in self._stats.items()}
+        for stage, (count, total, buckets) in sorted(stats.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float('inf'),), buckets):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'inference_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'inference_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'inference_stage_seconds_count{{stage="{stage}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def start_request_sample(self):
+        """Maybe start sampling the current thread; returns a token for finish_request_sample"""
+        if not (self.enabled and self.sample_rate and random.random() < self.sample_rate):
+            return None
+        thread_id = threading.get_ident()
+        self.sampler.watch(thread_id)
+        return thread_id
+
+    def finish_request_sample(self, token, name):
+        """Stop sampling and write <profile_dir>/<time>-<name>.folded; returns its path"""
+        stacks = self.sampler.unwatch(token)
+        if not stacks:
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{token}-{name}.folded")
+        write_folded(stacks, path)
+        return path
+
+    def capture(self, seconds):
+        """Sample every thread for a few seconds and return the folded stacks"""
+        key = ('all', uuid.uuid4().hex)    # overlapping captures each get their own Counter
+        stacks = self.sampler.watch(key)
+        time.sleep(min(seconds, MAX_CAPTURE_SECONDS))
+        self.sampler.unwatch(key)
+        return stacks
+
+    def authorized(self, remote_addr, token=None):
+        """Debug endpoints are open to localhost, or to anyone presenting PROFILE_TOKEN"""
+        if remote_addr in LOCAL_ADDRESSES:
+            return True
+        return bool(self.token and token and hmac.compare_digest(self.token, token))
+
+
+def profiler_from_env():
+    """PROFILING=on enables stage timers; PROFILE_SAMPLE_RATE (0-1) samples whole requests;
+    PROFILE_TOKEN opens /metrics and /debug/profile to non-local clients"""
+    return Profiler(
+        enabled=os.getenv('PROFILING', 'off') == 'on',
+        sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+        profile_dir=os.getenv('PROFILE_DIR', 'profiles'),
+        token=os.getenv('PROFILE_TOKEN') or None,
+    )
+
+
+def init_profiling(app, profiler):
+    """Hook a Flask app: request timing, sampled request profiles, /metrics and /debug/profile"""
+    from flask import Response, abort, g, request
+
+    if not profiler.enabled:
+        return profiler
+
+    @app.before_request
+    def start_profile():
+        g.profile_start = time.perf_counter()
+        g.profile_token = profiler.start_request_sample()
+
+    @app.after_request
+    def finish_profile(response):
+        start = g.pop('profile_start', None)
+        if start is not None:
+            profiler.record(f"request:{request.endpoint}", time.perf_counter() - start)
+        token = g.pop('profile_token', None)
+        if token is not None:
+            profiler.finish_request_sample(token, request.endpoint or 'unknown')
+        return response
+
+    def require_access():
+        auth = request.headers.get('Authorization', '')
+        token = auth[7:] if auth.startswith('Bearer ') else None
+        if not profiler.authorized(request.remote_addr, token):
+            abort(403)
+
+    @app.route('/metrics')
+    def profiling_metrics():
+        require_access()
+        return Response(profiler.prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/debug/profile')
+    def debug_profile():
+        """Sample all threads for ?seconds=N and download the result as folded stacks"""
+        require_access()
+        try:
+            seconds = float(request.args.get('seconds', 10))
+        except ValueError:
+            seconds = float('nan')
+        if not (math.isfinite(seconds) and seconds > 0):
+            return Response("seconds must be a positive number\n", status=400, mimetype='text/plain')
+        stacks = profiler.capture(seconds)
+        body = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return Response(body, mimetype='text/plain',
+                        headers={'Content-Disposition': 'attachment; filename=profile.folded'})
+
+    return profiler
+
+
+def measure_overhead(calls=200000):
+    """Nanoseconds per stage() call with profiling off vs on"""
+    results = {}
+    for enabled in (False, True):
+        profiler = Profiler(enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(calls):
+            with profiler.stage('noop'):
+                pass
+        results['on' if enabled else 'off'] = round(1e9 * (time.perf_counter() - start) / calls, 1)
+    return results
+
+
+if __name__ == "__main__":
+    print("ns per stage() call:", measure_overhead())
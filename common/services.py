@@ -0,0 +1,61 @@
+import os
+import threading
+
+from common.jobs import JobQueue
+from common.upload_store import store_from_env
+
+# One instance of each per process: a standalone app gets its own, and every
+# app mounted in the gateway shares the same job workers and upload store.
+_lock = threading.Lock()
+_handlers = {}    # task -> handler(task, payload, **options)
+_jobs = None
+_uploads = None
+
+
+def dispatch(task, payload, **options):
+    """JobQueue handler that routes each job to the handler registered for its task"""
+    if task not in _handlers:
+        raise ValueError(f"No classifier registered for '{task}'")
+    return _handlers[task](task, payload, **options)
+
+
+def job_queue(task, handler):
+    """The process's JobQueue, with handler registered for task"""
+    global _jobs
+    with _lock:
+        _handlers[task] = handler
+        if _jobs is None:
+            _jobs = JobQueue(dispatch, db_path=os.getenv("JOB_DB", ":memory:"),
+                             workers=int(os.getenv("JOB_WORKERS", "2")))
+        return _jobs
+
+
+def upload_store(root):
+    """The process's UploadStore; UPLOAD_ROOT overrides, otherwise the first app's root is used"""
+    global _uploads
+    with _lock:
+        if _uploads is None:
+            _uploads = store_from_env(os.getenv("UPLOAD_ROOT", root))
+        return _uploads
+
+
+def tasks():
+    """Classifiers registered in this process"""
+    return sorted(_handlers)
+
+
+def job_metrics():
+    return _jobs.metrics() if _jobs is not None else None
+
+
+def classify(task, payload, timeout=30, **options):
+    """Run image bytes through a registered classifier on the shared workers and wait for the result"""
+    if task not in _handlers:
+        raise LookupError(f"No classifier registered for '{task}'")
+    job_id, _ = _jobs.submit(task, payload, priority='interactive', options=options)
+    job = _jobs.wait(job_id, timeout)
+    if job['status'] == 'failed':
+        raise ValueError(job['error'])
+    if job['status'] != 'done':
+        raise TimeoutError(f"{task} classification did not finish within {timeout}s")
+    return job['result']
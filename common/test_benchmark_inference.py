@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# Benchmark helper tests (a stub Flask app instead of a model)
+
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+from common.benchmark_inference import summarize, http_load
+
+
+def test_summarize_reports_milliseconds():
+    stats = summarize([0.001, 0.002, 0.003])
+    assert stats['count'] == 3 and stats['mean'] == 2.0 and stats['max'] == 3.0
+    assert summarize([]) == {'count': 0}
+
+
+def test_http_load_counts_errors(tmp_path):
+    app = Flask(__name__)
+
+    @app.route('/', methods=['POST'])
+    def index():
+        data = request.files['file'].read()
+        return 'An error occurred' if data == b'bad' else 'ok'
+
+    (tmp_path / 'good.jpg').write_bytes(b'good')
+    (tmp_path / 'bad.jpg').write_bytes(b'bad')
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        stats = http_load(url, [str(tmp_path / 'good.jpg'), str(tmp_path / 'bad.jpg')], concurrency=2, requests=6)
+    finally:
+        server.shutdown()
+    assert stats['count'] == 3 and stats['errors'] == 3 and stats['concurrency'] == 2
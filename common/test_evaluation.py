@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Evaluation metric tests (hand-checked numbers, no model needed)
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from common.evaluation import compute_metrics, compare, save_run, load_run, report, run_inference
+
+CLASSES = ['a', 'b', 'c']
+SCORES = np.array([
+    [0.9, 0.05, 0.05],   # a -> a
+    [0.6, 0.3, 0.1],     # b -> a, b is 2nd
+    [0.1, 0.8, 0.1],     # b -> b
+    [0.2, 0.3, 0.5],     # c -> c
+])
+LABELS = np.array([0, 1, 1, 2])
+
+
+def test_confusion_and_per_class():
+    metrics = compute_metrics(SCORES, LABELS, CLASSES, n_boot=50)
+    assert metrics['confusion_matrix'] == [[1, 0, 0], [1, 1, 0], [0, 0, 1]]
+    assert metrics['accuracy'] == 0.75
+    assert metrics['per_class']['a'] == {'precision': 0.5, 'recall': 1.0, 'f1': 0.6667, 'support': 1}
+    assert metrics['per_class']['b']['recall'] == 0.5
+
+
+def test_top_k():
+    metrics = compute_metrics(SCORES, LABELS, CLASSES, n_boot=50)
+    assert metrics['top_1'] == 0.75
+    assert metrics['top_2'] == 1.0
+    assert metrics['top_3'] == 1.0
+
+
+def test_ece_matches_loop_definition():
+    rng = np.random.default_rng(1)
+    scores = rng.dirichlet(np.ones(3), size=500)
+    labels = rng.integers(0, 3, size=500)
+    metrics = compute_metrics(scores, labels, CLASSES, n_bins=10, n_boot=50)
+
+    confidence, correct = scores.max(1), scores.argmax(1) == labels
+    expected = 0.0
+    for low in np.arange(10) / 10:
+        in_bin = (confidence >= low) & (confidence < low + 0.1)
+        if in_bin.any():
+            expected += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    assert abs(metrics['ece'] - expected) < 1e-3
+    assert sum(metrics['reliability']['counts']) == 500
+
+
+def test_bootstrap_interval_contains_point_estimate():
+    rng = np.random.default_rng(2)
+    scores = rng.dirichlet(np.ones(3), size=300)
+    labels = rng.integers(0, 3, size=300)
+    metrics = compute_metrics(scores, labels, CLASSES, n_boot=200)
+    for key in ('accuracy', 'macro_f1', 'ece'):
+        low, high = metrics['bootstrap_95'][key]
+        assert low <= metrics[key] <= high
+
+
+def test_cached_runs_round_trip_and_compare(tmp_path):
+    timing = {'images': 4, 'batch_size': 2, 'images_per_second': 100.0, 'per_class_ms': [1.0, 1.5, 2.0]}
+    paths = ['a/1.jpg', 'b/2.jpg', 'b/3.jpg', 'c/4.jpg']
+    save_run(str(tmp_path / 'a.npz'), SCORES, LABELS, paths, CLASSES, timing)
+    save_run(str(tmp_path / 'b.npz'), np.eye(3)[LABELS], LABELS, paths, CLASSES, {**timing, 'images_per_second': 150.0})
+
+    run_a = load_run(str(tmp_path / 'a.npz'))
+    assert run_a['paths'] == paths
+    assert report(run_a)['throughput']['per_class_ms'] == {'a': 1.0, 'b': 1.5, 'c': 2.0}
+
+    rows = compare(run_a, load_run(str(tmp_path / 'b.npz')))
+    assert rows['accuracy'] == {'a': 0.75, 'b': 1.0, 'delta': 0.25}
+    assert rows['images_per_second']['delta'] == 50.0
+
+
+class RecordingModel:
+    """Scores each image by its red channel and remembers every batch it saw"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_on_batch(self, batch):
+        self.batches.append(batch[:, 0, 0, 0].copy())
+        return batch[:, 0, 0, :1]
+
+
+def test_inference_warms_up_and_times_each_class_on_its_own_batches(tmp_path):
+    labels = np.array([0, 1, 0, 1, 1, 0, 1])
+    paths = []
+    for i, label in enumerate(labels):
+        path = str(tmp_path / f"{i}.png")
+        Image.new('RGB', (8, 8), (100 * label, 0, 0)).save(path)
+        paths.append(path)
+
+    model = RecordingModel()
+    scores, timing = run_inference(model, paths, 8, batch_size=2, labels=labels)
+    assert len(model.batches) == 1 + 2 + 2    # warm-up, then 2 batches per class
+    assert all(len(set(batch)) == 1 for batch in model.batches[1:])
+    np.testing.assert_allclose(scores[:, 0], labels * 100 / 255, rtol=1e-6)
+    assert len(timing['per_class_ms']) == 2
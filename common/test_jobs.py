@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Job queue tests (plain Python handlers, no model needed)
+
+import io
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask import Flask
+
+from common.jobs import JobQueue, QueueFull, create_job_blueprint
+
+
+def test_submit_returns_immediately_and_completes():
+    queue = JobQueue(lambda task, payload: {'length': len(payload)})
+    job_id, deduplicated = queue.submit('skin', b'abc')
+    assert not deduplicated
+    job = queue.wait(job_id, timeout=5)
+    assert job['status'] == 'done' and job['result'] == {'length': 3}
+    queue.shutdown()
+
+
+def test_same_content_is_deduplicated():
+    release = threading.Event()
+    queue = JobQueue(lambda task, payload: release.wait(5) and 'ok', workers=1)
+    first, _ = queue.submit('skin', b'same image')
+    second, deduplicated = queue.submit('skin', b'same image')
+    other, _ = queue.submit('mri', b'same image')
+    assert second == first and deduplicated
+    assert other != first
+    release.set()
+    assert queue.wait(first, timeout=5)['result'] == 'ok'
+    assert queue.metrics()['deduplicated'] == 1
+    queue.shutdown()
+
+
+def test_finished_jobs_are_not_reused():
+    versions = iter(['v1', 'v2'])
+    queue = JobQueue(lambda task, payload: next(versions))
+    first, _ = queue.submit('skin', b'same image')
+    assert queue.wait(first, timeout=5)['result'] == 'v1'
+    second, deduplicated = queue.submit('skin', b'same image')
+    assert second != first and not deduplicated
+    assert queue.wait(second, timeout=5)['result'] == 'v2'
+    queue.shutdown()
+
+
+def test_interactive_jobs_overtake_bulk():
+    started, release = threading.Event(), threading.Event()
+    order = []
+
+    def handler(task, payload):
+        started.set()
+        release.wait(5)
+        order.append(payload)
+
+    queue = JobQueue(handler, workers=1)
+    blocker, _ = queue.submit('skin', b'blocker')
+    started.wait(5)
+    queue.submit('skin', b'bulk-1', priority='bulk')
+    queue.submit('skin', b'bulk-2', priority='bulk')
+    urgent, _ = queue.submit('skin', b'urgent', priority='interactive')
+    assert queue.get(urgent)['queue_position'] == 0
+    assert queue.metrics()['queue_depth'] == {'interactive': 1, 'bulk': 2}
+
+    release.set()
+    for job_id in (blocker, urgent):
+        queue.wait(job_id, timeout=5)
+    queue.shutdown()
+    assert order == [b'blocker', b'urgent', b'bulk-1', b'bulk-2']
+    assert queue.metrics()['wait_ms']['count'] == 4
+
+
+def test_unknown_priority_is_rejected():
+    queue = JobQueue(lambda task, payload: 'ok')
+    with pytest.raises(ValueError):
+        queue.submit('skin', b'image', priority='urgent')
+    assert queue.wait(queue.submit('skin', b'image')[0], timeout=5)['result'] == 'ok'
+    queue.shutdown()
+
+
+def test_blueprint_rejects_unknown_priority_with_400():
+    queue = JobQueue(lambda task, payload: 'ok')
+    app = Flask(__name__)
+    app.register_blueprint(create_job_blueprint(queue, 'skin'))
+    response = app.test_client().post('/api/jobs', data={'file': (io.BytesIO(b'image'), 'a.jpg'), 'priority': '5'})
+    assert response.status_code == 400
+    queue.shutdown()
+
+
+def test_failures_are_reported_and_can_be_resubmitted():
+    def handler(task, payload):
+        raise ValueError("cannot decode")
+
+    queue = JobQueue(handler)
+    job_id, _ = queue.submit('skin', b'broken')
+    job = queue.wait(job_id, timeout=5)
+    assert job['status'] == 'failed' and job['error'] == 'cannot decode'
+    assert queue.submit('skin', b'broken')[0] != job_id
+    queue.shutdown()
+
+
+def test_bounded_queue_rejects_when_full():
+    release = threading.Event()
+    queue = JobQueue(lambda task, payload: release.wait(5), workers=1, max_pending=1)
+    queue.submit('skin', b'running')
+    queue.wait(queue.submit('skin', b'running')[0], timeout=0.2)
+    queue.submit('skin', b'queued')
+    with pytest.raises(QueueFull):
+        queue.submit('skin', b'one too many')
+    release.set()
+    queue.shutdown()
+
+
+def test_sqlite_queue_requeues_running_jobs_after_restart(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    never = threading.Event()
+    first = JobQueue(lambda task, payload: never.wait(0.5), db_path=db_path, workers=1)
+    job_id, _ = first.submit('skin', b'interrupted')
+    first.wait(job_id, timeout=0.1)
+
+    second = JobQueue(lambda task, payload: 'recovered', db_path=db_path, workers=1)
+    assert second.wait(job_id, timeout=5)['result'] == 'recovered'
+    never.set()
+    first.shutdown()
+    second.shutdown()
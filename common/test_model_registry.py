@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# Model registry tests (fake loader, no TensorFlow needed)
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.model_registry import ModelRegistry, parse_routing
+
+
+def write_artifact(root, name, version):
+    os.makedirs(os.path.join(root, name), exist_ok=True)
+    path = os.path.join(root, name, f"{version}.keras")
+    with open(path, 'w') as f:
+        f.write(version)
+    return path
+
+
+def fake_loader(calls):
+    def load(path):
+        calls.append(path)
+        with open(path) as f:
+            return f"model-{f.read()}"
+    return load
+
+
+def test_discovers_versions_in_numeric_order(tmp_path):
+    for version in ['v2', 'v10', 'v1']:
+        write_artifact(str(tmp_path), 'skin', version)
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader([]))
+    assert [v for v, _ in registry.discover('skin')] == ['v1', 'v2', 'v10']
+    assert registry.next_version_path('skin').endswith(os.path.join('skin', 'v11.keras'))
+
+
+def test_legacy_path_is_used_until_a_version_exists(tmp_path):
+    legacy = tmp_path / 'old_model.h5'
+    legacy.write_text('legacy')
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader([]), legacy_paths={'mri': str(legacy)})
+    assert registry.get('mri') == ('legacy', 'model-legacy')
+
+    write_artifact(str(tmp_path), 'mri', 'v1')
+    assert registry.refresh('mri') == 'v1'
+    assert registry.get('mri') == ('v1', 'model-v1')
+    assert registry.versions('mri') == ['v1']
+
+
+def test_loads_each_version_once(tmp_path):
+    write_artifact(str(tmp_path), 'skin', 'v1')
+    calls = []
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader(calls))
+    for _ in range(5):
+        registry.get('skin')
+    registry.refresh('skin')
+    assert len(calls) == 1
+
+
+def test_hot_swap_keeps_handed_out_model(tmp_path):
+    write_artifact(str(tmp_path), 'skin', 'v1')
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader([]))
+    version, in_flight = registry.get('skin')
+
+    write_artifact(str(tmp_path), 'skin', 'v2')
+    registry.refresh('skin')
+    assert in_flight == 'model-v1'
+    assert registry.get('skin') == ('v2', 'model-v2')
+
+
+def test_ab_routing_is_sticky_per_key(tmp_path):
+    write_artifact(str(tmp_path), 'skin', 'v1')
+    write_artifact(str(tmp_path), 'skin', 'v2')
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader([]))
+    registry.set_routing('skin', parse_routing('v1=0.5, v2=0.5'))
+
+    picks = {registry.get('skin', key=f"client-{i}")[0] for i in range(200)}
+    assert picks == {'v1', 'v2'}
+    assert registry.get('skin', key='client-7') == registry.get('skin', key='client-7')
+
+    # Newer artifacts don't evict versions that routing still uses
+    write_artifact(str(tmp_path), 'skin', 'v3')
+    registry.refresh('skin')
+    assert registry.versions('skin') == ['v1', 'v2', 'v3']
+
+
+def test_parse_routing():
+    assert parse_routing('v3=0.9,v4=0.1') == {'v3': 0.9, 'v4': 0.1}
+    assert parse_routing(None) == {}
+
+
+def test_routing_to_a_missing_version_falls_back_to_latest(tmp_path):
+    write_artifact(str(tmp_path), 'skin', 'v1')
+    registry = ModelRegistry(str(tmp_path), loader=fake_loader([]), routing={'skin': parse_routing('v1=0.9,v2=0.1')})
+    assert {registry.get('skin', key=f"client-{i}")[0] for i in range(100)} == {'v1'}
+    assert registry.routing['skin'] == {'v1': 0.9}
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# Preprocessing buffer tests
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from common import preprocess
+
+
+def write_image(path):
+    rng = np.random.default_rng(0)
+    Image.fromarray(rng.integers(0, 256, (40, 60, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def test_pooled_buffer_matches_allocating_path(tmp_path):
+    img = preprocess.decode(write_image(tmp_path / 'a.png'), 32)
+    batch = preprocess.InputBuffer(32, batch_size=2).fill(img, index=1)
+    assert batch.dtype == np.float32 and batch.shape == (2, 32, 32, 3)
+    np.testing.assert_allclose(batch[1], preprocess.to_batch(img)[0], atol=1e-6)
+
+
+def test_pool_reuses_buffers_and_counts_misses():
+    pool = preprocess.BufferPool(8, count=1)
+    with pool.lease() as first:
+        pass
+    with pool.lease() as again:
+        assert again is first
+        with pool.lease() as extra:
+            assert extra is not first
+    assert pool.misses == 1
+
+
+def test_pooled_path_only_allocates_the_uint8_pixels(tmp_path):
+    profile = preprocess.allocation_profile(write_image(tmp_path / 'a.png'), 128, calls=20)
+    assert profile['to_batch']['peak_bytes_per_call'] > 128 * 128 * 3 * 4
+    # np.asarray(img) copies the pixels out of Pillow (plus small overhead); no float32 temporaries
+    assert profile['buffer_pool']['peak_bytes_per_call'] < 2 * 128 * 128 * 3
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Profiling hook tests (no model needed)
+
+import os
+import sys
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from common import profiling
+from common.profiling import Profiler, init_profiling, measure_overhead
+
+
+def test_disabled_profiler_is_a_no_op():
+    profiler = Profiler()
+    assert profiler.stage('decode') is profiler.stage('predict')
+    with profiler.stage('decode'):
+        pass
+    assert 'stage="decode"' not in profiler.prometheus()
+
+
+def test_stage_timings_are_exported_as_histograms():
+    profiler = Profiler(enabled=True)
+    with profiler.stage('decode'):
+        time.sleep(0.002)
+    profiler.record('decode', 0.2)
+    text = profiler.prometheus()
+    assert 'inference_stage_seconds_count{stage="decode"} 2' in text
+    assert 'inference_stage_seconds_bucket{stage="decode",le="0.25"} 2' in text
+    assert 'inference_stage_seconds_bucket{stage="decode",le="0.001"} 0' in text
+
+
+def test_sampled_requests_write_folded_stacks(tmp_path):
+    app = Flask(__name__)
+    profiler = init_profiling(app, Profiler(enabled=True, sample_rate=1.0, profile_dir=str(tmp_path), interval=0.001))
+
+    @app.route('/slow')
+    def slow():
+        with profiler.stage('predict'):
+            time.sleep(0.05)
+        return 'ok'
+
+    client = app.test_client()
+    assert client.get('/slow').data == b'ok'
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith('-slow.folded')
+    assert 'slow (test_profiling.py' in open(tmp_path / files[0]).read()
+
+    metrics = client.get('/metrics').data.decode()
+    assert 'stage="predict"' in metrics and 'stage="request:slow"' in metrics
+    assert client.get('/debug/profile?seconds=0.05').status_code == 200
+
+
+def test_debug_routes_need_localhost_or_token():
+    app = Flask(__name__)
+    init_profiling(app, Profiler(enabled=True, token='secret'))
+    client = app.test_client()
+    remote = {'REMOTE_ADDR': '10.0.0.7'}
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer secret'}).status_code == 200
+    assert client.get('/debug/profile?seconds=0.01', environ_base=remote).status_code == 403
+    assert client.get('/metrics').status_code == 200    # the test client is 127.0.0.1
+
+
+def test_invalid_capture_seconds_are_rejected():
+    app = Flask(__name__)
+    init_profiling(app, Profiler(enabled=True))
+    client = app.test_client()
+    for seconds in ('abc', '-1', '0', 'nan'):
+        assert client.get(f'/debug/profile?seconds={seconds}').status_code == 400
+
+
+def test_overlapping_captures_do_not_clash():
+    profiler = Profiler(enabled=True, interval=0.001)
+    results = {}
+    long_capture = threading.Thread(target=lambda: results.update(long=profiler.capture(0.3)))
+    long_capture.start()
+    time.sleep(0.05)
+    short = profiler.capture(0.05)
+    long_capture.join()
+    # The long capture keeps sampling after the short one ends
+    assert sum(short.values()) and sum(results['long'].values()) > sum(short.values())
+    assert not profiler.sampler._watched
+
+
+def test_concurrent_first_samples_share_one_sampler(monkeypatch):
+    class SlowSampler(profiling.Sampler):
+        def __init__(self, interval):
+            time.sleep(0.05)    # widen the window between the None check and the assignment
+            super().__init__(interval)
+
+    monkeypatch.setattr(profiling, 'Sampler', SlowSampler)
+    profiler = Profiler(enabled=True)
+    start = threading.Barrier(4)
+    samplers = []
+
+    def first_use():
+        start.wait()
+        samplers.append(profiler.sampler)
+
+    threads = [threading.Thread(target=first_use) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(sampler) for sampler in samplers}) == 1
+
+
+def test_overhead_is_measured_for_both_modes():
+    overhead = measure_overhead(calls=1000)
+    assert set(overhead) == {'off', 'on'} and overhead['off'] > 0
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# Shared service tests (plain Python handlers, no model needed)
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from common import services
+
+
+@pytest.fixture
+def fresh_services(monkeypatch):
+    monkeypatch.setattr(services, '_handlers', {})
+    monkeypatch.setattr(services, '_jobs', None)
+    yield services
+    if services._jobs is not None:
+        services._jobs.shutdown()
+
+
+def test_apps_share_one_queue_and_jobs_reach_their_handler(fresh_services):
+    skin = fresh_services.job_queue('skin', lambda task, payload: {'class': 'Acne'})
+    mri = fresh_services.job_queue('mri', lambda task, payload: {'class': 'glioma'})
+    assert skin is mri
+    assert fresh_services.tasks() == ['mri', 'skin']
+    assert fresh_services.classify('mri', b'scan') == {'class': 'glioma'}
+    assert fresh_services.classify('skin', b'scan') == {'class': 'Acne'}
+
+
+def test_classify_reports_unknown_tasks_and_failures(fresh_services):
+    def broken(task, payload):
+        raise ValueError("cannot decode")
+
+    fresh_services.job_queue('skin', broken)
+    with pytest.raises(LookupError):
+        fresh_services.classify('xray', b'scan')
+    with pytest.raises(ValueError, match='cannot decode'):
+        fresh_services.classify('skin', b'scan')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Test-time augmentation tests (fake model, no TensorFlow needed)
+
+import os
+import sys
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from common.tta import TTAPredictor, build_view_maps, make_views
+
+
+class FakeModel:
+    """Scores each image by its mean of the left half vs right half; records batch sizes"""
+
+    def __init__(self, delay=0.0):
+        self.batch_sizes = []
+        self.delay = delay
+
+    def predict_on_batch(self, batch):
+        self.batch_sizes.append(len(batch))
+        time.sleep(self.delay)
+        half = batch.shape[2] // 2
+        left = batch[:, :, :half].mean(axis=(1, 2, 3))
+        right = batch[:, :, half:].mean(axis=(1, 2, 3))
+        total = left + right + 1e-9
+        return np.stack([left / total, right / total], axis=1)
+
+
+def test_views_include_identity_and_flip():
+    batch = np.random.default_rng(0).random((2, 8, 8, 3)).astype(np.float32)
+    maps = build_view_maps(8, angles=(-10, 10), crop=0.9)
+    views = make_views(batch, maps).reshape(2, 5, 8, 8, 3)
+    assert np.array_equal(views[:, 0], batch)
+    assert np.array_equal(views[:, 1], batch[:, :, ::-1])
+
+
+def test_tta_is_one_batched_call_and_averages():
+    model = FakeModel()
+    predictor = TTAPredictor(8, angles=(), crop=None)   # identity + flip
+    batch = np.zeros((3, 8, 8, 3), dtype=np.float32)
+    batch[:, :, :4] = 1.0   # all mass on the left
+
+    probs, used = predictor.predict(model, batch)
+    assert used
+    assert model.batch_sizes == [6]
+    # The flipped view puts the mass on the right, so the average is even
+    np.testing.assert_allclose(probs, 0.5, atol=1e-6)
+
+
+def test_falls_back_when_over_budget_then_probes_again():
+    model = FakeModel(delay=0.02)
+    predictor = TTAPredictor(8, budget_ms=5, probe_every=3)
+    batch = np.ones((1, 8, 8, 3), dtype=np.float32)
+
+    assert predictor.predict(model, batch)[1]          # first call measures TTA latency
+    used = [predictor.predict(model, batch)[1] for _ in range(3)]
+    assert used == [False, False, True]                # third fallback re-probes
+
+
+class BlockingModel(FakeModel):
+    """Holds every call until release is set, counting how many are inside at once"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.inside = threading.Semaphore(0)
+
+    def predict_on_batch(self, batch):
+        self.inside.release()
+        self.release.wait(5)
+        return super().predict_on_batch(batch)
+
+
+def test_falls_back_under_load():
+    model = BlockingModel()
+    predictor = TTAPredictor(8, max_inflight=2)
+    batch = np.ones((1, 8, 8, 3), dtype=np.float32)
+    used = {}
+
+    def call(name):
+        probs, used[name] = predictor.predict(model, batch)
+        assert probs.shape == (1, 2)
+
+    threads = []
+    for name in ('first', 'second', 'third'):    # each call is inside the model before the next starts
+        threads.append(threading.Thread(target=call, args=(name,)))
+        threads[-1].start()
+        assert model.inside.acquire(timeout=5)
+    model.release.set()
+    for thread in threads:
+        thread.join()
+    assert used == {'first': True, 'second': True, 'third': False}
+    assert predictor.predict(model, batch)[1]    # slots are freed once the passes finish
+
+
+def test_opt_out_is_single_pass():
+    model = FakeModel()
+    _, used = TTAPredictor(8).predict(model, np.ones((2, 8, 8, 3), dtype=np.float32), tta=False)
+    assert not used and model.batch_sizes == [2]
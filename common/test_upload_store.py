@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Upload store tests
+
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from common.upload_store import UploadStore, create_upload_blueprint
+
+
+def test_files_are_named_by_hash_and_sharded(tmp_path):
+    store = UploadStore(str(tmp_path))
+    rel = store.save(b'image bytes', 'scan.JPG')
+    first, second, name = rel.split('/')
+    assert name.endswith('.jpg') and name.startswith(first + second)
+    assert open(store.path(rel), 'rb').read() == b'image bytes'
+
+
+def test_same_name_different_content_does_not_overwrite(tmp_path):
+    store = UploadStore(str(tmp_path))
+    a = store.save(b'first', 'upload.png')
+    b = store.save(b'second', 'upload.png')
+    assert a != b
+    assert open(store.path(a), 'rb').read() == b'first'
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    store = UploadStore(str(tmp_path))
+    assert store.save(b'same', 'a.png') == store.save(b'same', 'b.png')
+    assert store.usage()['files'] == 1 and store.usage()['bytes'] == 4
+
+
+def test_unknown_extensions_are_neutralised(tmp_path):
+    store = UploadStore(str(tmp_path))
+    assert store.save(b'<script>', 'page.html').endswith('.bin')
+
+
+def test_evicts_oldest_over_size_quota(tmp_path):
+    store = UploadStore(str(tmp_path), max_bytes=10)
+    old = store.save(b'x' * 6, 'old.png')
+    store._files[old][1] -= 100
+    new = store.save(b'y' * 6, 'new.png')
+    assert store.evict() == 1
+    assert not os.path.exists(store.path(old)) and os.path.exists(store.path(new))
+    assert store.usage()['bytes'] == 6
+
+
+def test_evicts_expired_files(tmp_path):
+    store = UploadStore(str(tmp_path), max_age_seconds=60)
+    stale = store.save(b'stale', 'a.png')
+    store._files[stale][1] = time.time() - 120
+    fresh = store.save(b'fresh', 'b.png')
+    assert store.evict() == 1
+    assert store.usage()['files'] == 1 and os.path.exists(store.path(fresh))
+
+
+def test_existing_files_are_indexed_on_startup(tmp_path):
+    rel = UploadStore(str(tmp_path)).save(b'persisted', 'a.png')
+    (tmp_path / 'legacy.jpg').write_bytes(b'flat file from before sharding')
+    reopened = UploadStore(str(tmp_path))
+    assert reopened.usage() == {'files': 1, 'bytes': 9, 'max_bytes': None, 'max_age_seconds': None}
+    assert reopened.save(b'persisted', 'a.png') == rel
+
+
+def test_only_content_addressed_uploads_are_served(tmp_path):
+    store = UploadStore(str(tmp_path))
+    rel = store.save(b'image bytes', 'scan.png')
+    (tmp_path / 'legacy.jpg').write_bytes(b'flat file named by the client')
+    (tmp_path / rel.rsplit('/', 1)[0] / '.upload-abc123').write_bytes(b'half written')
+    app = Flask(__name__)
+    app.register_blueprint(create_upload_blueprint(store))
+    client = app.test_client()
+
+    response = client.get(f'/uploads/{rel}')
+    assert response.status_code == 200 and 'immutable' in response.headers['Cache-Control']
+    for name in ('legacy.jpg', f"{rel.rsplit('/', 1)[0]}/.upload-abc123", '00/00/' + rel.rsplit('/', 1)[1]):
+        assert client.get(f'/uploads/{name}').status_code == 404
@@ -0,0 +1,88 @@
+import time
+import threading
+
+import numpy as np
+
+
+def build_view_maps(size, angles=(-10, 10), crop=0.9):
+    """Precompute (rows, cols) gather maps for each test-time view of a size x size image.
+
+    Views: identity, horizontal flip, small rotations and a center crop zoomed back
+    to full size. Sampling is nearest-neighbour with edge clamping, so every view
+    is a single fancy-index gather.
+    """
+    ys, xs = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    center = (size - 1) / 2.0
+    maps = [(ys, xs), (ys, size - 1 - xs)]
+
+    for angle in angles:
+        theta = np.deg2rad(angle)
+        dy, dx = ys - center, xs - center
+        src_y = center + dy * np.cos(theta) - dx * np.sin(theta)
+        src_x = center + dy * np.sin(theta) + dx * np.cos(theta)
+        maps.append((np.clip(np.rint(src_y), 0, size - 1).astype(np.intp),
+                     np.clip(np.rint(src_x), 0, size - 1).astype(np.intp)))
+
+    if crop:
+        src_y = center + (ys - center) * crop
+        src_x = center + (xs - center) * crop
+        maps.append((np.rint(src_y).astype(np.intp), np.rint(src_x).astype(np.intp)))
+
+    rows = np.stack([r for r, _ in maps])
+    cols = np.stack([c for _, c in maps])
+    return rows, cols
+
+
+def make_views(batch, view_maps):
+    """(N, H, W, C) -> (N * V, H, W, C), all views built in one gather"""
+    rows, cols = view_maps
+    views = batch[:, rows, cols]
+    return views.reshape((-1,) + batch.shape[1:])
+
+
+class TTAPredictor:
+    """Runs test-time augmentation as one batched forward pass, within a latency budget.
+
+    Falls back to a single pass when the measured TTA latency exceeds budget_ms
+    or max_inflight TTA passes are already running. While falling
+    back, TTA is re-tried every probe_every requests so it recovers after a burst.
+    """
+
+    def __init__(self, image_size, budget_ms=250, max_inflight=4, probe_every=20, **view_options):
+        self.view_maps = build_view_maps(image_size, **view_options)
+        self.num_views = len(self.view_maps[0])
+        self.budget_ms = budget_ms
+        self.max_inflight = max_inflight
+        self.probe_every = probe_every
+        self.tta_ms = None     # EWMA of TTA call latency
+        self._skipped = 0
+        self._tta_inflight = 0
+        self._lock = threading.Lock()
+
+    def _use_tta(self):
+        """Decide and, if TTA is chosen, reserve one of the max_inflight slots under the same lock"""
+        with self._lock:
+            overloaded = self._tta_inflight >= self.max_inflight
+            over_budget = self.tta_ms is not None and self.tta_ms > self.budget_ms
+            if overloaded or over_budget:
+                self._skipped += 1
+                if overloaded or self._skipped < self.probe_every:
+                    return False
+                self._skipped = 0
+            self._tta_inflight += 1
+            return True
+
+    def predict(self, model, batch, tta=True):
+        """Return (probabilities (N, C), whether TTA was used)"""
+        if not (tta and self._use_tta()):
+            return np.asarray(model.predict_on_batch(batch)), False
+        try:
+            start = time.perf_counter()
+            probs = np.asarray(model.predict_on_batch(make_views(batch, self.view_maps)))
+            elapsed_ms = 1000 * (time.perf_counter() - start)
+            with self._lock:
+                self.tta_ms = elapsed_ms if self.tta_ms is None else 0.8 * self.tta_ms + 0.2 * elapsed_ms
+            return probs.reshape(len(batch), self.num_views, -1).mean(axis=1), True
+        finally:
+            with self._lock:
+                self._tta_inflight -= 1
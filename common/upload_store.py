@@ -0,0 +1,169 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import tempfile
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif', 'bmp', 'tiff'}
+ONE_YEAR = 365 * 24 * 3600
+STORED_NAME = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.(%s)$'
+                         % '|'.join(sorted(ALLOWED_EXTENSIONS | {'bin'})))
+
+
+class UploadStore:
+    """Content-addressed upload storage: <root>/ab/cd/<sha256>.<ext>.
+
+    Identical uploads share one file, names never collide, and two levels of
+    256-way sharding keep every directory small. Total size and file age are
+    bounded by a background eviction thread (oldest first, re-uploads refresh
+    a file's age).
+    """
+
+    def __init__(self, root, max_bytes=None, max_age_seconds=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._files = {}    # relative path -> [size, mtime]
+        self._total = 0
+        self._stop = threading.Event()
+        self._cleaner = None
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Index what is already on disk (one pass at startup)"""
+        for first in os.scandir(self.root):
+            if not first.is_dir():
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        stat = entry.stat()
+                        rel = f"{first.name}/{second.name}/{entry.name}"
+                        self._files[rel] = [stat.st_size, stat.st_mtime]
+                        self._total += stat.st_size
+
+    @staticmethod
+    def relative_path(digest, ext):
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+    def path(self, rel):
+        return os.path.join(self.root, *rel.split('/'))
+
+    def save(self, data, filename=''):
+        """Store bytes (or a file-like object) and return the relative path"""
+        if hasattr(data, 'read'):
+            data = data.read()
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        ext = ext if ext in ALLOWED_EXTENSIONS else 'bin'
+        rel = self.relative_path(hashlib.sha256(data).hexdigest(), ext)
+        target = self.path(rel)
+        now = time.time()
+
+        with self._lock:
+            if rel in self._files and os.path.exists(target):
+                os.utime(target, (now, now))
+                self._files[rel][1] = now
+                return rel
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.upload-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+        with self._lock:
+            if rel not in self._files:
+                self._total += len(data)
+            self._files[rel] = [len(data), now]
+        return rel
+
+    def usage(self):
+        with self._lock:
+            return {'files': len(self._files), 'bytes': self._total,
+                    'max_bytes': self.max_bytes, 'max_age_seconds': self.max_age_seconds}
+
+    def evict(self):
+        """Drop files past max_age, then the oldest until under max_bytes; returns the count removed"""
+        with self._lock:
+            victims = []
+            if self.max_age_seconds:
+                cutoff = time.time() - self.max_age_seconds
+                victims = [rel for rel, (_, mtime) in self._files.items() if mtime < cutoff]
+            if self.max_bytes is not None:
+                remaining = self._total - sum(self._files[rel][0] for rel in victims)
+                if remaining > self.max_bytes:
+                    expired = set(victims)
+                    for rel, (size, _) in sorted(self._files.items(), key=lambda item: item[1][1]):
+                        if remaining <= self.max_bytes:
+                            break
+                        if rel not in expired:
+                            victims.append(rel)
+                            remaining -= size
+            for rel in victims:
+                self._total -= self._files.pop(rel)[0]
+
+        for rel in victims:
+            try:
+                os.remove(self.path(rel))
+            except FileNotFoundError:
+                pass
+        return len(victims)
+
+    def start_cleanup(self, interval=60):
+        """Run evict() every interval seconds in a daemon thread"""
+        if self._cleaner is not None:
+            return
+
+        def clean():
+            while not self._stop.wait(interval):
+                try:
+                    removed = self.evict()
+                    if removed:
+                        print(f"Evicted {removed} uploads from {self.root}")
+                except Exception as e:
+                    print(f"Error cleaning uploads: {e}")
+
+        self._cleaner = threading.Thread(target=clean, name='upload-cleanup', daemon=True)
+        self._cleaner.start()
+
+    def stop_cleanup(self):
+        self._stop.set()
+        if self._cleaner is not None:
+            self._cleaner.join()
+            self._cleaner = None
+
+
+def create_upload_blueprint(store, url_prefix='/uploads'):
+    """Serve stored uploads; names are content hashes, so responses are cacheable forever"""
+    from flask import Blueprint, abort, send_from_directory
+
+    uploads = Blueprint('uploads', __name__, url_prefix=url_prefix)
+
+    @uploads.route('/<path:name>')
+    def preview(name):
+        # Only content-addressed names are immutable; temp files and legacy flat files are not served
+        if not STORED_NAME.match(name):
+            abort(404)
+        response = send_from_directory(store.root, name, max_age=ONE_YEAR, conditional=True)
+        response.headers['Cache-Control'] = f"public, max-age={ONE_YEAR}, immutable"
+        return response
+
+    return uploads
+
+
+def store_from_env(root, prefix='UPLOAD'):
+    """UploadStore configured from <prefix>_MAX_MB / <prefix>_MAX_AGE_HOURS, with cleanup started"""
+    max_mb = os.getenv(f"{prefix}_MAX_MB", "1024")
+    max_hours = os.getenv(f"{prefix}_MAX_AGE_HOURS", "72")
+    store = UploadStore(
+        root,
+        max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None,
+        max_age_seconds=float(max_hours) * 3600 if max_hours else None,
+    )
+    store.start_cleanup(int(os.getenv(f"{prefix}_CLEANUP_SECONDS", "60")))
+    return store
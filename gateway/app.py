@@ -0,0 +1,96 @@
+import os
+import sys
+import base64
+import importlib.util
+from flask import Flask, Blueprint, jsonify, request
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+sys.path.append(ROOT_DIR)
+
+from common import services
+from common.jobs import QueueFull
+
+# CONFIG: sub-apps and where they are mounted (the chatbot's JS calls /api/chat, so it stays at the root)
+CHATBOT_DIR = os.path.join(ROOT_DIR, "Advance_Chatbot")
+MOUNTS = {
+    "/skin": ("skin_app", os.path.join(ROOT_DIR, "skin")),
+    "/mri": ("mri_app", os.path.join(ROOT_DIR, "MRI_3D")),
+}
+TRIAGE_TIMEOUT = float(os.getenv("TRIAGE_TIMEOUT_SECONDS", "30"))
+
+
+def load_app(module_name, directory):
+    """Import <directory>/app.py under its own module name (every service's module is called app)"""
+    sys.path.append(directory)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# One process: TensorFlow, the job workers and the upload store are loaded once and shared
+try:
+    chatbot = load_app("chatbot_app", CHATBOT_DIR)
+    app = chatbot.app
+except Exception as e:
+    print(f"Error loading chatbot: {e}")
+    chatbot = None
+    app = Flask(__name__)
+
+classifiers = {}
+for prefix, (module_name, directory) in MOUNTS.items():
+    try:
+        classifiers[prefix] = load_app(module_name, directory)
+    except Exception as e:
+        print(f"Error loading {module_name}: {e}")
+
+app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {prefix: module.app for prefix, module in classifiers.items()})
+
+gateway = Blueprint("gateway", __name__)
+
+
+@gateway.route("/api/triage", methods=["POST"])
+def triage():
+    """Classify an image with a local model: multipart 'file', or the chatbot's JSON {'image': {'data': base64}}"""
+    if request.files.get("file"):
+        payload = request.files["file"].read()
+        task = request.form.get("task", "skin")
+    else:
+        data = request.get_json(silent=True) or {}
+        try:
+            payload = base64.b64decode((data.get("image") or {}).get("data", ""), validate=True)
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({"error": "Image data must be base64"}), 400
+        task = data.get("task", "skin")
+    if not payload:
+        return jsonify({"error": "Image required"}), 400
+
+    try:
+        prediction = services.classify(task, payload, timeout=TRIAGE_TIMEOUT)
+    except LookupError as e:
+        return jsonify({"error": str(e), "available": services.tasks()}), 404
+    except (TimeoutError, QueueFull) as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    return jsonify({"task": task, "prediction": prediction, "success": True})
+
+
+@gateway.route("/api/gateway/status", methods=["GET"])
+def status():
+    """What is mounted and how the shared job workers are doing"""
+    return jsonify({
+        "chatbot": chatbot is not None,
+        "classifiers": services.tasks(),
+        "mounts": sorted(classifiers),
+        "jobs": services.job_metrics(),
+    })
+
+
+app.register_blueprint(gateway)
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
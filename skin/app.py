@@ -1,20 +1,84 @@
 from flask import Flask, render_template, request
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 import numpy as np
+import io
 import os
-from werkzeug.utils import secure_filename
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BASE_DIR))
+
+from common.model_registry import ModelRegistry, parse_routing
+from common.tta import TTAPredictor
+from common import preprocess, services
+from common.jobs import create_job_blueprint
+from common.upload_store import create_upload_blueprint
+from common.profiling import profiler_from_env, init_profiling
 
 app = Flask(__name__)
 
+# Opt-in stage timers (/metrics), sampled request profiles and /debug/profile (PROFILING=on)
+profiler = init_profiling(app, profiler_from_env())
+
+# Versioned artifacts under model/skin_cnn/, old single file as fallback
+MODEL_NAME = "skin_cnn"
+registry = ModelRegistry(
+    os.path.join(BASE_DIR, "model"),
+    legacy_paths={MODEL_NAME: os.path.join(BASE_DIR, "model", "skin_cnn_model.keras")},
+    routing={MODEL_NAME: parse_routing(os.getenv("SKIN_MODEL_ROUTING"))},
+)
+
 try:
-    model = load_model("model/skin_cnn_model.keras")
+    registry.load(MODEL_NAME)
 except Exception as e:
     print(f"Error loading model: {e}")
-    model = None
+registry.start_watcher(int(os.getenv("MODEL_POLL_SECONDS", "30")))
+
+# Opt-in test-time augmentation (TTA_MODE=on, or tta=1 in the form); falls back to
+# a single forward pass when over the latency budget or under load
+TTA_MODE = os.getenv("TTA_MODE", "off") == "on"
+tta = TTAPredictor(128, budget_ms=float(os.getenv("TTA_BUDGET_MS", "250")),
+                   max_inflight=int(os.getenv("TTA_MAX_INFLIGHT", "4")))
+
+# Preallocated float32 input buffers reused across requests (one per concurrent prediction)
+buffers = preprocess.BufferPool(128, count=int(os.getenv("PREPROCESS_BUFFERS", "8")))
 
 classes = ['Acne', 'Eczema', 'Psoriasis', 'Rosacea', 'Vitiligo']
 
+def predict_image(source, use_tta=TTA_MODE, key=None):
+    """Classify an image path or file-like object"""
+    # Image preprocess and prediction
+    with profiler.stage("decode"):
+        img = preprocess.decode(source, 128)
+
+    try:
+        model_version, model = registry.get(MODEL_NAME, key=key)
+    except LookupError:
+        raise ValueError("Model is not loaded.")
+
+    with buffers.lease() as buffer:
+        with profiler.stage("normalize"):
+            img_array = buffer.fill(img)
+        with profiler.stage("predict"):
+            prediction, used_tta = tta.predict(model, img_array, tta=use_tta)
+    return {
+        "class": classes[np.argmax(prediction)],
+        "confidence": round(100 * float(np.max(prediction)), 2),
+        "model_version": model_version,
+        "tta": used_tta,
+    }
+
+def run_job(task, payload, tta=TTA_MODE):
+    return predict_image(io.BytesIO(payload), use_tta=tta)
+
+# Uploads are stored by content hash in sharded folders, bounded by size/age
+uploads = services.upload_store(os.path.join(BASE_DIR, "static", "uploads"))
+app.register_blueprint(create_upload_blueprint(uploads))
+
+# Async jobs: POST /api/jobs returns a job id; poll /api/jobs/<id> or stream /api/jobs/<id>/stream
+# (the worker pool is shared with the other classifiers when mounted in the gateway)
+jobs = services.job_queue("skin", run_job)
+app.register_blueprint(create_job_blueprint(jobs, "skin"))
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     pred_class = None
@@ -22,7 +86,9 @@ def index():
 
     if request.method == "POST":
         try:
-            if "file" not in request.files:
+            with profiler.stage("parse"):
+                has_file = "file" in request.files
+            if not has_file:
                 error_message = "No file part in the request."
                 raise ValueError(error_message)
 
@@ -31,23 +97,11 @@ def index():
                 error_message = "No file selected."
                 raise ValueError(error_message)
 
-            filename = secure_filename(file.filename)
-            upload_folder = os.path.join("static", "uploads")
-            os.makedirs(upload_folder, exist_ok=True)
-            filepath = os.path.join(upload_folder, filename)
-            file.save(filepath)
-
-            # Image preprocess and prediction
-            img = image.load_img(filepath, target_size=(128, 128))
-            img_array = image.img_to_array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-
-            if model is None:
-                error_message = "Model is not loaded."
-                raise ValueError(error_message)
+            with profiler.stage("save"):
+                filepath = uploads.path(uploads.save(file, file.filename))
 
-            prediction = model.predict(img_array)
-            pred_class = classes[np.argmax(prediction)]
+            use_tta = request.form.get("tta", "1" if TTA_MODE else "0") == "1"
+            pred_class = predict_image(filepath, use_tta, key=request.remote_addr)["class"]
 
         except Exception as e:
             error_message = f"An error occurred: {str(e)}"